@@ -0,0 +1,76 @@
+"""Keyword categorization: legacy per-keyword loop vs. the compiled matcher.
+
+    PYTHONPATH=src python benchmarks/bench_categorize.py --merchants 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import timeit
+from collections.abc import Mapping
+
+from smartbudget.ai import CATEGORY_KEYWORDS, DEFAULT_CATEGORY, KeywordMatcher
+
+SAMPLE_DESCRIPTIONS = (
+    "Uber para o trabalho",
+    "mercado do mês",
+    "Assinatura de streaming",
+    "Pagamento boleto diverso",
+    "farmácia do centro",
+    "Transferência recebida",
+)
+
+
+def legacy_categorize(description: str, table: Mapping[str, tuple[str, ...]]) -> str:
+    normalized = description.lower().strip()
+    for category, keywords in table.items():
+        if any(keyword in normalized for keyword in keywords):
+            return category
+    return DEFAULT_CATEGORY
+
+
+def synthetic_table(merchants: int, seed: int = 7) -> dict[str, tuple[str, ...]]:
+    rng = random.Random(seed)
+    table = {category: list(keywords) for category, keywords in CATEGORY_KEYWORDS.items()}
+    categories = list(table)
+    for index in range(merchants):
+        name = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 12)))
+        table[categories[index % len(categories)]].append(f"{name} {index}")
+    return {category: tuple(keywords) for category, keywords in table.items()}
+
+
+def measure(table: dict[str, tuple[str, ...]], repeat: int) -> dict[str, float]:
+    matcher = KeywordMatcher(table)
+    legacy = timeit.timeit(
+        lambda: [legacy_categorize(text, table) for text in SAMPLE_DESCRIPTIONS], number=repeat
+    )
+    compiled = timeit.timeit(
+        lambda: [matcher.match(text.lower().strip()) or DEFAULT_CATEGORY for text in SAMPLE_DESCRIPTIONS],
+        number=repeat,
+    )
+    calls = repeat * len(SAMPLE_DESCRIPTIONS)
+    return {
+        "keywords": len(matcher),
+        "legacy_us_per_call": round(legacy / calls * 1e6, 2),
+        "compiled_us_per_call": round(compiled / calls * 1e6, 2),
+        "speedup": round(legacy / compiled, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--merchants", type=int, default=5000, help="extra synthetic keywords")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {
+        "builtin_table": measure(dict(CATEGORY_KEYWORDS), args.repeat),
+        "large_table": measure(synthetic_table(args.merchants), max(args.repeat // 20, 1)),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Memory and speed of the object and columnar ledger backends.
+
+Loads N transactions spread over several years, each built the way a
+database row is (its own description and category strings), and reports
+the memory each ledger retains, the load time and the time of the queries
+the dashboard and reports run:
+
+    PYTHONPATH=src python benchmarks/bench_ledger.py --rows 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import date
+from decimal import Decimal
+
+from smartbudget.columnar import ColumnarLedger
+from smartbudget.ledger import Ledger
+from smartbudget.models import Transaction, TransactionType
+
+BACKENDS: dict[str, Callable[[], Ledger]] = {"objects": Ledger, "columnar": ColumnarLedger}
+DESCRIPTIONS = ("Mercado do bairro", "Uber para o trabalho", "Farmácia", "Assinatura de streaming", "Aluguel")
+CATEGORIES = ("Alimentação", "Transporte", "Saúde", "Lazer", "Moradia")
+YEARS = 5
+
+
+def rows(count: int) -> Iterator[Transaction]:
+    for index in range(count):
+        when = date(2022 + index % YEARS, 1 + index % 12, 1 + index % 28)
+        if index % 10 == 0:
+            yield Transaction(Decimal("4500.00"), "".join("Salário"), when, "".join("Receita"), TransactionType.INCOME, index)
+            continue
+        # join() makes fresh strings, as sqlite3 does for every row it returns.
+        description = "".join(DESCRIPTIONS[index % 5])
+        category = "".join(CATEGORIES[index % 5])
+        amount = Decimal(index % 50_000 + 100).scaleb(-2)
+        yield Transaction(amount, description, when, category, TransactionType.EXPENSE, index)
+
+
+def retained_bytes(factory: Callable[[], Ledger], count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    ledger = factory()
+    ledger.record_transactions(rows(count))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ledger
+    return retained
+
+
+def measure(factory: Callable[[], Ledger], count: int) -> dict[str, float]:
+    # Tracing slows allocation down: measure memory and time in separate loads.
+    retained = retained_bytes(factory, count)
+    gc.collect()
+    started = time.perf_counter()
+    ledger = factory()
+    ledger.record_transactions(rows(count))
+    load = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for year in range(2022, 2022 + YEARS):
+        for month in range(1, 13):
+            ledger.monthly_summary(year, month)
+            ledger.expense_by_category(year, month)
+    summaries = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ledger.category_breakdown((2022, 1), (2022 + YEARS - 1, 12))
+    ledger.rolling_averages((2022, 1), (2022 + YEARS - 1, 12))
+    reports = time.perf_counter() - started
+
+    started = time.perf_counter()
+    month = ledger.transactions_for(2024, 6)
+    month_rows = time.perf_counter() - started
+
+    return {
+        "bytes_per_transaction": round(retained / count, 1) if count else 0,
+        "retained_mb": round(retained / 2**20, 1),
+        "load_seconds": round(load, 3),
+        "summaries_ms": round(summaries * 1e3, 3),
+        "reports_ms": round(reports * 1e3, 3),
+        "month_rows": len(month),
+        "month_rows_ms": round(month_rows * 1e3, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    results = {
+        str(count): {name: measure(factory, count) for name, factory in BACKENDS.items()} for count in args.rows
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Time to load a user's whole history with `list_transactions`.
+
+Seeds one user with N transactions, then compares the previous row
+decoding (every field parsed per row, enum lookups by value) with the
+repository's current path, and reports the memory the loaded list holds:
+
+    PYTHONPATH=src python benchmarks/bench_list_transactions.py --rows 1000000
+
+Seeding a million rows takes a while; pass `--db` to keep the database
+between runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from smartbudget.models import CategoryStatus, Transaction, TransactionType
+from smartbudget.repositories import TransactionRepository
+
+DESCRIPTIONS = (
+    ("Mercado do bairro", "Alimentação"),
+    ("Uber para o trabalho", "Transporte"),
+    ("Farmácia", "Saúde"),
+    ("Assinatura de streaming", "Lazer"),
+    ("Aluguel", "Moradia"),
+)
+LEGACY_QUERY = (
+    "SELECT id, amount, description, date, category, type, category_status"
+    " FROM transactions WHERE user_id = ? ORDER BY id ASC"
+)
+
+
+def synthetic(rows: int, seed: int) -> Iterator[Transaction]:
+    rng = random.Random(seed)
+    for index in range(rows):
+        when = date(2020 + index % 6, 1 + index % 12, rng.randint(1, 28))
+        if index % 10 == 0:
+            yield Transaction(Decimal("4500.00"), "Salário", when, "Receita", TransactionType.INCOME)
+            continue
+        description, category = DESCRIPTIONS[index % len(DESCRIPTIONS)]
+        cents = rng.randint(500, 50_000)
+        yield Transaction(Decimal(cents).scaleb(-2), description, when, category, TransactionType.EXPENSE)
+
+
+def legacy_list(repo: TransactionRepository, user_id: int) -> list[Transaction]:
+    with repo._pool.connection("legacy_list") as conn:
+        rows = conn.execute(LEGACY_QUERY, (user_id,)).fetchall()
+    return [
+        Transaction(
+            amount=Decimal(amount),
+            description=description,
+            date=date.fromisoformat(txn_date),
+            category=category,
+            type=TransactionType(txn_type),
+            id=txn_id,
+            category_status=CategoryStatus(status),
+        )
+        for txn_id, amount, description, txn_date, category, txn_type, status in rows
+    ]
+
+
+def measure(load: Callable[[], list[Transaction]], repeat: int) -> dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        load()
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(best, 3),
+        "rows_per_second": round(len(loaded) / best),
+        "retained_mb": round(retained / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", type=Path, help="reuse (or create) this database instead of a temporary one")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or Path(tmp) / "bench.db"
+        repo = TransactionRepository(str(db_path))
+        created, payload = repo.create_user("Bench", "bench@example.com", "1234")
+        if created:
+            repo.insert_many(int(payload), synthetic(args.rows, args.seed), chunk_size=20_000)
+        _, user = repo.authenticate_user("bench@example.com", "1234")
+        user_id = user[0]  # type: ignore[index]
+
+        results = {
+            "rows": len(repo.list_transactions(user_id)),
+            "legacy": measure(lambda: legacy_list(repo, user_id), args.repeat),
+            "current": measure(lambda: repo.list_transactions(user_id), args.repeat),
+        }
+        repo.close()
+    results["speedup"] = round(results["legacy"]["seconds"] / results["current"]["seconds"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
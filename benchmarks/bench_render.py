@@ -0,0 +1,94 @@
+"""Dashboard and login page rendering time.
+
+Renders one month holding N transactions (the table shows one page of
+them), both as the byte chunks the handler sends and through the `str`
+helpers, with an empty render cache, then once more from the cache:
+
+    PYTHONPATH=src python benchmarks/bench_render.py --rows 0 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import timeit
+from datetime import date
+from decimal import Decimal
+
+from smartbudget.models import Transaction, TransactionType
+from smartbudget.repositories import TransactionRepository
+from smartbudget.web import app
+from smartbudget.web.cache import LedgerCache
+
+DESCRIPTIONS = ("Mercado <centro>", "Uber para o trabalho", "Farmácia & cia", "Salário")
+
+
+def synthetic_month(rows: int) -> list[Transaction]:
+    return [
+        Transaction(
+            amount=Decimal(index % 500) + Decimal("0.90"),
+            description=DESCRIPTIONS[index % len(DESCRIPTIONS)],
+            date=date(2026, 3, 1 + index % 28),
+            category="Receita" if index % 4 == 3 else "Alimentação",
+            type=TransactionType.INCOME if index % 4 == 3 else TransactionType.EXPENSE,
+        )
+        for index in range(rows)
+    ]
+
+
+def measure(rows: int, repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        app.repository = TransactionRepository(f"{tmp}/bench.db")
+        app.repository.insert_many(1, synthetic_month(rows))
+        app.ledger_cache = LedgerCache(app.repository.list_transactions)
+        try:
+            return _measure(rows, repeat)
+        finally:
+            app.repository.close()
+
+
+def _measure(rows: int, repeat: int) -> dict[str, float]:
+    def chunks() -> bytes:
+        app.render_cache.clear()
+        return b"".join(app.render_dashboard_chunks("Ana", 1, period="2026-03"))
+
+    def text() -> bytes:
+        app.render_cache.clear()
+        return app.render_dashboard("Ana", 1, period="2026-03").encode("utf-8")
+
+    def cached() -> bytes:
+        return b"".join(app.render_dashboard_chunks("Ana", 1, period="2026-03"))
+
+    chunks()  # warm the ledger cache
+    cached()
+    per_render = {
+        name: timeit.timeit(fn, number=repeat) / repeat for name, fn in (("chunks", chunks), ("str", text), ("cached", cached))
+    }
+    result = {"rows": rows, "bytes": len(cached())}
+    for name, seconds in per_render.items():
+        result[f"{name}_ms"] = round(seconds * 1e3, 3)
+        if rows:
+            result[f"{name}_ms_per_1k_rows"] = round(seconds * 1e3 / rows * 1000, 3)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[0, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    auth_repeat = args.repeat * 100
+    results = {
+        "auth_page_us": round(timeit.timeit(app.render_auth_chunks, number=auth_repeat) / auth_repeat * 1e6, 3),
+        "auth_page_with_error_us": round(
+            timeit.timeit(lambda: app.render_auth_chunks("Senha inválida."), number=auth_repeat) / auth_repeat * 1e6, 3
+        ),
+        "dashboard": [measure(rows, max(args.repeat * 1000 // max(rows, 1000), 1)) for rows in args.rows],
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
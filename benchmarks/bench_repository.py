@@ -0,0 +1,83 @@
+"""Repository throughput under concurrent writers.
+
+Compares the legacy setup (a fresh connection per call, rollback journal,
+synchronous=FULL) with the pooled WAL configuration used by default:
+
+    PYTHONPATH=src python benchmarks/bench_repository.py --threads 8 --ops 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from smartbudget.models import Transaction, TransactionType
+from smartbudget.repositories import TransactionRepository
+
+CONFIGURATIONS = {
+    "legacy": {"pool_size": 0, "journal_mode": "DELETE", "synchronous": "FULL"},
+    "pooled_wal": {"pool_size": 8, "journal_mode": "WAL", "synchronous": "NORMAL"},
+}
+
+
+def run_configuration(db_path: Path, threads: int, ops: int, **options: object) -> dict[str, float]:
+    repo = TransactionRepository(str(db_path), **options)  # type: ignore[arg-type]
+    _, user_id = repo.create_user("Bench", "bench@example.com", "1234")
+    txn = Transaction(
+        amount=Decimal("42.90"),
+        description="Mercado",
+        date=date(2026, 2, 19),
+        category="Alimentação",
+        type=TransactionType.EXPENSE,
+    )
+    errors: list[BaseException] = []
+
+    def worker(index: int) -> None:
+        try:
+            for op in range(ops):
+                # Mirror the web workload: every request authenticates, some write.
+                repo.get_user(int(user_id))
+                if (op + index) % 2 == 0:
+                    repo.insert_transaction(int(user_id), txn)
+        except BaseException as exc:  # noqa: BLE001 - reported in the results
+            errors.append(exc)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    repo.close()
+
+    return {
+        "requests": threads * ops,
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(threads * ops / elapsed, 1),
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=500, help="requests per thread")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in CONFIGURATIONS.items():
+            results[name] = run_configuration(Path(tmp) / f"{name}.db", args.threads, args.ops, **options)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Load test of the web routes against a locally started server.
+
+Seeds a SQLite database with synthetic users and transactions, starts the
+app with `run()` (or `run_async()`) in a subprocess and drives the hot
+routes from concurrent clients, then prints per-route latency percentiles
+and throughput as JSON, with the read routes and the write route (a
+transaction saved through `POST /api/transactions`) also summarized apart:
+
+    PYTHONPATH=src python benchmarks/load.py --scale 100k --clients 16 --duration 20
+    PYTHONPATH=src python benchmarks/load.py --scale 1k --mode prefork --workers 4
+
+Seeding 10M rows takes a while; pass `--workdir` to keep the database and
+`--reuse` to skip seeding on the next runs. Compare the JSON of two commits
+run with the same arguments to catch regressions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from urllib.parse import urlencode
+
+from smartbudget.models import Transaction, TransactionType
+from smartbudget.repositories import TransactionRepository
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+READ_ROUTES = ("dashboard", "transactions", "home", "login")
+WRITE_ROUTES = ("save",)
+ROUTES = READ_ROUTES + WRITE_ROUTES
+PASSWORD = "load-test"
+DESCRIPTIONS = (
+    ("Mercado do bairro", "Alimentação"),
+    ("Uber para o trabalho", "Transporte"),
+    ("Farmácia", "Saúde"),
+    ("Assinatura de streaming", "Lazer"),
+    ("Aluguel", "Moradia"),
+)
+SERVERS = {
+    "thread": "from smartbudget.web.app import run; run('127.0.0.1', {port})",
+    "prefork": "from smartbudget.web.app import run; run('127.0.0.1', {port}, workers={workers})",
+    "asyncio": "from smartbudget.web.aio import run_async; run_async('127.0.0.1', {port})",
+}
+
+
+def recent_months(count: int) -> list[tuple[int, int]]:
+    today = date.today()
+    year, month = today.year, today.month
+    months = []
+    for _ in range(count):
+        months.append((year, month))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return months
+
+
+def synthetic_transactions(rows: int, months: list[tuple[int, int]], rng: random.Random) -> Iterator[Transaction]:
+    for index in range(rows):
+        year, month = months[index % len(months)]
+        when = date(year, month, rng.randint(1, 28))
+        if index % 10 == 0:
+            yield Transaction(Decimal("4500.00"), "Salário", when, "Receita", TransactionType.INCOME)
+            continue
+        description, category = DESCRIPTIONS[index % len(DESCRIPTIONS)]
+        cents = rng.randint(500, 50_000)
+        yield Transaction(Decimal(cents).scaleb(-2), description, when, category, TransactionType.EXPENSE)
+
+
+def seed(db_path: Path, users: int, rows: int, months: list[tuple[int, int]], seed_value: int) -> list[str]:
+    repo = TransactionRepository(str(db_path))
+    rng = random.Random(seed_value)
+    emails = []
+    for index in range(users):
+        email = f"load{index}@example.com"
+        ok, user_id = repo.create_user(f"Usuário {index}", email, PASSWORD)
+        if not ok:
+            raise SystemExit(f"{db_path} already holds load-test users; use --reuse or a fresh --workdir")
+        per_user = rows // users + (1 if index < rows % users else 0)
+        repo.insert_many(int(user_id), synthetic_transactions(per_user, months, rng), chunk_size=10_000)
+        emails.append(email)
+    repo.close()
+    return emails
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workdir: Path, mode: str, workers: int) -> tuple[subprocess.Popen, int]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVERS[mode].format(port=port, workers=workers)],
+        cwd=workdir,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            conn.getresponse().read()
+            conn.close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("server did not start")
+
+
+class Client:
+    def __init__(self, port: int, email: str, periods: list[str], rng: random.Random) -> None:
+        self.port = port
+        self.email = email
+        self.periods = periods
+        self.rng = rng
+        self.cookie = ""
+
+    def request(self, route: str) -> int:
+        period = self.rng.choice(self.periods)
+        headers = {"Cookie": self.cookie, "Accept-Encoding": "gzip"}
+        body = None
+        if route == "login":
+            method, path = "POST", "/api/login"
+            body = f"email={self.email}&password={PASSWORD}"
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        elif route == "dashboard":
+            method, path = "GET", f"/api/dashboard?period={period}"
+        elif route == "transactions":
+            method, path = "GET", f"/api/transactions?period={period}&limit=50"
+        elif route == "save":
+            method, path = "POST", "/api/transactions"
+            description, _ = self.rng.choice(DESCRIPTIONS)
+            body = urlencode(
+                {
+                    "transaction_type": "expense",
+                    "amount": f"{self.rng.randint(500, 50_000) / 100:.2f}",
+                    "description": description,
+                    "txn_date": f"{period}-{self.rng.randint(1, 28):02d}",
+                }
+            )
+            headers = {"Cookie": self.cookie, "Content-Type": "application/x-www-form-urlencoded"}
+        else:
+            method, path = "GET", f"/?period={period}"
+
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if route == "login" and response.status == 200:
+                self.cookie = response.getheader("Set-Cookie", "").split(";", maxsplit=1)[0]
+            return response.status
+        finally:
+            conn.close()
+
+
+def drive(port: int, emails: list[str], clients: int, duration: float, warmup: float, periods: list[str], seed_value: int):
+    samples: dict[str, list[float]] = {route: [] for route in ROUTES}
+    errors: dict[str, int] = {route: 0 for route in ROUTES}
+    lock = threading.Lock()
+    start_at = time.monotonic() + warmup
+    stop_at = start_at + duration
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed_value + index)
+        client = Client(port, emails[index % len(emails)], periods, rng)
+        client.request("login")
+        while True:
+            route = rng.choice(ROUTES)
+            started = time.monotonic()
+            if started >= stop_at:
+                return
+            try:
+                ok = client.request(route) < 400
+            except OSError:
+                ok = False
+            elapsed = time.monotonic() - started
+            if started < start_at:
+                continue
+            with lock:
+                samples[route].append(elapsed)
+                if not ok:
+                    errors[route] += 1
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, errors
+
+
+def summarize(latencies: list[float], errors: int, duration: float) -> dict[str, float]:
+    if len(latencies) < 2:
+        return {"requests": len(latencies), "errors": errors}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / duration, 1),
+        "p50_ms": round(cuts[49] * 1e3, 2),
+        "p95_ms": round(cuts[94] * 1e3, 2),
+        "p99_ms": round(cuts[98] * 1e3, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="total transactions to seed")
+    parser.add_argument("--rows", type=int, help="exact number of transactions (overrides --scale)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--months", type=int, default=24, help="months the transactions are spread over")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--mode", choices=SERVERS, default="thread")
+    parser.add_argument("--workers", type=int, default=2, help="processes in prefork mode")
+    parser.add_argument("--workdir", type=Path, help="keep the database here (default: a temporary directory)")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding when the workdir already has a database")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = args.rows if args.rows is not None else SCALES[args.scale]
+    months = recent_months(args.months)
+    periods = [f"{year:04d}-{month:02d}" for year, month in months]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        # `run()` keeps its database at data/smartbudget.db relative to the working directory.
+        db_path = workdir / "data" / "smartbudget.db"
+        seed_seconds = 0.0
+        if args.reuse and db_path.exists():
+            emails = [f"load{index}@example.com" for index in range(args.users)]
+        else:
+            started = time.perf_counter()
+            emails = seed(db_path, args.users, rows, months, args.seed)
+            seed_seconds = time.perf_counter() - started
+
+        process, port = start_server(workdir, args.mode, args.workers)
+        try:
+            samples, errors = drive(port, emails, args.clients, args.duration, args.warmup, periods, args.seed)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def combined(routes: tuple[str, ...]) -> dict[str, float]:
+        latencies = [latency for route in routes for latency in samples[route]]
+        return summarize(latencies, sum(errors[route] for route in routes), args.duration)
+
+    results = {
+        "config": {
+            "rows": rows,
+            "users": args.users,
+            "months": args.months,
+            "clients": args.clients,
+            "duration": args.duration,
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "prefork" else 1,
+        },
+        "seed_seconds": round(seed_seconds, 2),
+        "routes": {route: summarize(samples[route], errors[route], args.duration) for route in ROUTES},
+        "reads": combined(READ_ROUTES),
+        "writes": combined(WRITE_ROUTES),
+        "total": combined(ROUTES),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
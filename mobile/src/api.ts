@@ -32,7 +32,16 @@ export type SessionPayload = {
   };
 };
 
-export type DashboardPayload = {
+export type DashboardTransaction = {
+  date: string;
+  description: string;
+  category: string;
+  type: "income" | "expense";
+  amount: string;
+  category_status?: "pending" | "final";
+};
+
+export type DashboardSummaryPayload = {
   period: string;
   summary: {
     income: string;
@@ -41,13 +50,34 @@ export type DashboardPayload = {
   };
   top_category: string;
   insight: string;
-  transactions: Array<{
-    date: string;
-    description: string;
-    category: string;
-    type: "income" | "expense";
-    amount: string;
-  }>;
+};
+
+export type DashboardPayload = DashboardSummaryPayload & {
+  transactions: DashboardTransaction[];
+  next_cursor?: string | null;
+};
+
+export type TransactionsPagePayload = {
+  period: string;
+  transactions: DashboardTransaction[];
+  next_cursor: string | null;
+};
+
+export type ReportMonth = {
+  period: string;
+  income: string;
+  expense: string;
+  balance: string;
+};
+
+export type ReportsPayload = {
+  start: string;
+  end: string;
+  window: number;
+  totals: Omit<ReportMonth, "period">;
+  months: ReportMonth[];
+  rolling: ReportMonth[];
+  categories: Array<{ category: string; amount: string }>;
 };
 
 export type CreateTransactionPayload = {
@@ -139,6 +169,36 @@ export async function fetchDashboard(period?: string): Promise<DashboardPayload
   return parseJson<DashboardPayload>(response);
 }
 
+export async function fetchDashboardSummary(period?: string): Promise<DashboardSummaryPayload | null> {
+  const query = period ? `?period=${period}` : "";
+  const response = await request(`/api/dashboard/summary${query}`, { credentials: "include" });
+  if (!response.ok) return null;
+  return parseJson<DashboardSummaryPayload>(response);
+}
+
+export async function fetchTransactionsPage(
+  period?: string,
+  cursor?: string | null,
+  limit = 50
+): Promise<TransactionsPagePayload | null> {
+  const params = new URLSearchParams({ limit: String(limit) });
+  if (period) params.set("period", period);
+  if (cursor) params.set("cursor", cursor);
+  const response = await request(`/api/transactions?${params.toString()}`, { credentials: "include" });
+  if (!response.ok) return null;
+  return parseJson<TransactionsPagePayload>(response);
+}
+
+export async function fetchReports(start?: string, end?: string, window?: number): Promise<ReportsPayload | null> {
+  const params = new URLSearchParams();
+  if (start) params.set("start", start);
+  if (end) params.set("end", end);
+  if (window) params.set("window", String(window));
+  const response = await request(`/api/reports?${params.toString()}`, { credentials: "include" });
+  if (!response.ok) return null;
+  return parseJson<ReportsPayload>(response);
+}
+
 export async function createTransaction(payload: CreateTransactionPayload): Promise<boolean> {
   const body = new URLSearchParams(payload);
   const response = await request("/api/transactions", {
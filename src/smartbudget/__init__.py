@@ -1,4 +1,4 @@
 from .ledger import Ledger
-from .models import MonthlySummary, Transaction, TransactionType
+from .models import CategoryStatus, MonthlySummary, Transaction, TransactionType
 
-__all__ = ["Ledger", "MonthlySummary", "Transaction", "TransactionType"]
+__all__ = ["CategoryStatus", "Ledger", "MonthlySummary", "Transaction", "TransactionType"]
@@ -1,7 +1,17 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from decimal import Decimal
+from typing import Protocol
+
+from smartbudget.metrics import CATEGORIZATION_SECONDS
 
 DEFAULT_CATEGORY = "Outros"
 
@@ -17,31 +27,383 @@ CATEGORY_KEYWORDS: dict[str, tuple[str, ...]] = {
 
 
 AIProvider = Callable[[str], str]
+# One category per description, in the same order.
+BatchAIProvider = Callable[[list[str]], list[str]]
+
+
+class KeywordMatcher:
+    """Keyword table compiled into a single regular expression.
+
+    All keywords are merged into one trie-shaped pattern, so a description is
+    scanned once no matter how many keywords the table holds. Priority rules:
+    at a given position the longest keyword wins ("uber eats" over "uber"),
+    and across positions the category listed first in the table wins.
+    """
+
+    def __init__(self, table: Mapping[str, Iterable[str]]) -> None:
+        self._keywords: dict[str, tuple[int, str]] = {}
+        for priority, (category, keywords) in enumerate(table.items()):
+            for keyword in keywords:
+                keyword = keyword.lower().strip()
+                if keyword and keyword not in self._keywords:
+                    self._keywords[keyword] = (priority, category)
+
+        self._pattern = None
+        if self._keywords:
+            # The lookahead makes every start position visible, including
+            # keywords that overlap an earlier match.
+            self._pattern = re.compile(f"(?=({_trie_pattern(self._keywords)}))")
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def match(self, text: str) -> str | None:
+        """Return the category for already-lowercased `text`, or `None`."""
+
+        if self._pattern is None:
+            return None
+
+        best: tuple[int, str] | None = None
+        for found in self._pattern.finditer(text):
+            candidate = self._keywords[found.group(1)]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+                if best[0] == 0:
+                    break
+        return best[1] if best else None
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        terminal = "" in node
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        # Greedy optional group: prefer the longer keyword, fall back to this one.
+        return group + "?" if terminal else group
+
+    return build(trie)
+
+
+DEFAULT_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
+
+
+def normalize_description(description: str) -> str:
+    """Cache key for a description: lowercase with whitespace collapsed."""
+
+    return " ".join(description.lower().split())
+
+
+class CategoryStore(Protocol):
+    def load_category(self, key: str) -> str | None: ...
+
+    def save_category(self, key: str, category: str) -> None: ...
+
+
+class CategoryCache:
+    """LRU cache of categories keyed by normalized description.
+
+    Recurring merchants are categorized once; with a `store` (for example the
+    SQLite repository) results also survive restarts and are shared between
+    processes.
+    """
+
+    def __init__(self, max_entries: int = 4096, store: CategoryStore | None = None) -> None:
+        self.max_entries = max_entries
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, description: str) -> str | None:
+        key = normalize_description(description)
+        with self._lock:
+            category = self._entries.get(key)
+            if category is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return category
+
+        category = self.store.load_category(key) if self.store else None
+        with self._lock:
+            if category is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, category)
+        return category
+
+    def put(self, description: str, category: str) -> None:
+        key = normalize_description(description)
+        with self._lock:
+            self._remember(key, category)
+        if self.store:
+            self.store.save_category(key, category)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
 
+    def _remember(self, key: str, category: str) -> None:
+        self._entries[key] = category
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
 
-def categorize_transaction(description: str, ai_provider: AIProvider | None = None) -> str:
+
+def categorize_transaction(
+    description: str,
+    ai_provider: AIProvider | None = None,
+    matcher: KeywordMatcher | None = None,
+    cache: CategoryCache | None = None,
+) -> str:
     """Return a category for transaction text.
 
     If an AI provider is available it is used first; if it fails or returns an
-    empty string, fallback keyword classification is applied.
+    empty string, fallback keyword classification is applied using `matcher`
+    (the built-in `CATEGORY_KEYWORDS` table by default). With a `cache`,
+    provider answers are remembered so repeated descriptions skip the call.
+    Keyword fallbacks are never cached: matching is cheaper than a lookup,
+    and a cached fallback would hide the provider's answer later on.
     """
 
-    normalized = description.lower().strip()
+    started = time.perf_counter()
+    if ai_provider and cache is not None:
+        cached = cache.get(description)
+        if cached is not None:
+            CATEGORIZATION_SECONDS.observe(time.perf_counter() - started, "cache")
+            return cached
 
     if ai_provider:
         try:
             suggestion = ai_provider(description).strip()
             if suggestion:
+                if cache is not None:
+                    cache.put(description, suggestion)
+                CATEGORIZATION_SECONDS.observe(time.perf_counter() - started, "provider")
                 return suggestion
         except Exception:
             # Intentionally silent: the app should keep working even when AI fails.
             pass
 
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        if any(keyword in normalized for keyword in keywords):
-            return category
+    category = (matcher or DEFAULT_MATCHER).match(description.lower().strip()) or DEFAULT_CATEGORY
+    # Includes the time lost on a failed provider call before falling back.
+    CATEGORIZATION_SECONDS.observe(time.perf_counter() - started, "keyword")
+    return category
+
+
+def batched(provider: AIProvider) -> BatchAIProvider:
+    """Adapt a one-description provider to the batch protocol."""
+
+    def call(descriptions: list[str]) -> list[str]:
+        return [provider(description) for description in descriptions]
+
+    return call
+
+
+class BatchCategorizer:
+    """Categorize many descriptions through a batch provider running in worker threads.
+
+    Unique, uncached descriptions (compared after `normalize_description`)
+    are split into batches of `batch_size` and sent to `provider` with at most
+    `max_workers` calls in flight. Each call gets `timeout` seconds; items
+    from calls that time out, fail or return blanks fall back to keyword
+    matching, so the result always has one category per input. Only provider
+    answers go into `cache`; without a provider every item is keyword-matched
+    directly.
+
+    A call that outlives its timeout cannot be interrupted and keeps its
+    worker until the provider returns, so providers must enforce their own
+    network timeouts. While every worker is held by such calls, new batches
+    fall back at once instead of waiting for a worker.
+    """
+
+    def __init__(
+        self,
+        provider: BatchAIProvider | None = None,
+        *,
+        batch_size: int = 32,
+        max_workers: int = 4,
+        timeout: float = 5.0,
+        matcher: KeywordMatcher | None = None,
+        cache: CategoryCache | None = None,
+    ) -> None:
+        self.provider = provider
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.matcher = matcher
+        self.cache = cache
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid = 0
+        # Provider calls holding a worker, and those of them past their timeout.
+        self._calls = threading.Condition()
+        self._running: set[int] = set()
+        self._overdue: set[int] = set()
+        self._call_ids = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def categorize(self, descriptions: Sequence[str]) -> list[str]:
+        return [category for category, _ in self.resolve(descriptions)]
+
+    def resolve(self, descriptions: Sequence[str]) -> list[tuple[str, bool]]:
+        """Like `categorize`, paired with whether each category is an answer.
+
+        The flag is false for keyword fallbacks taken because the provider is
+        missing, failed, timed out or left the item blank; callers that keep
+        provisional categories should retry those later.
+        """
+
+        if self.provider is None:
+            return [(self._keyword(description), False) for description in descriptions]
+
+        keys = [normalize_description(description) for description in descriptions]
+        resolved: dict[str, tuple[str, bool]] = {}
+        # First spelling seen of each uncached description, sent to the provider.
+        pending: dict[str, str] = {}
+        for key, description in zip(keys, descriptions):
+            if key in resolved or key in pending:
+                continue
+            cached = self.cache.get(description) if self.cache is not None else None
+            if cached is not None:
+                resolved[key] = (cached, True)
+            else:
+                pending[key] = description
+
+        if pending:
+            with CATEGORIZATION_SECONDS.time("batch_provider"):
+                answers = self._ask_provider(self.provider, list(pending.values()))
+            for key, description in pending.items():
+                answer = answers.get(description)
+                resolved[key] = (answer, True) if answer is not None else (self._keyword(description), False)
+
+        return [resolved[key] for key in keys]
+
+    def close(self) -> None:
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+    def _ask_provider(self, provider: BatchAIProvider, pending: list[str]) -> dict[str, str]:
+        queued = deque(pending[start : start + self.batch_size] for start in range(0, len(pending), self.batch_size))
+        executor = self._get_executor()
+        # future -> (call id, batch, deadline)
+        running: dict[Future[list[str]], tuple[int, list[str], float]] = {}
+        answers: dict[str, str] = {}
+        while queued or running:
+            # Only wait for a worker when none of our own calls will free one.
+            while queued and (call_id := self._reserve(0 if running else self.timeout)) is not None:
+                batch = queued.popleft()
+                future = executor.submit(self._call, provider, call_id, batch)
+                running[future] = (call_id, batch, time.monotonic() + self.timeout)
+            if not running:
+                # No worker freed up in time: the rest keeps the keyword fallback.
+                break
+
+            earliest = min(deadline for _, _, deadline in running.values())
+            done, _ = wait(running, timeout=max(earliest - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future, (call_id, batch, deadline) in list(running.items()):
+                if future in done:
+                    del running[future]
+                    self._collect(future, batch, answers)
+                elif deadline <= now:
+                    # Timed out: keep the keyword fallback and stop waiting for it.
+                    del running[future]
+                    self._abandon(future, call_id)
+        return answers
+
+    def _collect(self, future: Future[list[str]], batch: list[str], answers: dict[str, str]) -> None:
+        try:
+            suggestions = future.result()
+        except Exception:
+            # Provider errors keep the keyword fallback.
+            return
+        if len(suggestions) != len(batch):
+            return
+        for description, suggestion in zip(batch, suggestions):
+            suggestion = (suggestion or "").strip()
+            if suggestion:
+                answers[description] = suggestion
+                if self.cache is not None:
+                    self.cache.put(description, suggestion)
+
+    def _reserve(self, wait_for: float) -> int | None:
+        """Claim a worker for one call; `None` when none frees up within `wait_for` seconds."""
+
+        deadline = time.monotonic() + wait_for
+        with self._calls:
+            while len(self._running) >= self.max_workers:
+                remaining = deadline - time.monotonic()
+                # Overdue calls may never return: do not wait on a pool they fill.
+                if remaining <= 0 or len(self._overdue) >= self.max_workers:
+                    return None
+                self._calls.wait(remaining)
+            call_id = next(self._call_ids)
+            self._running.add(call_id)
+            return call_id
+
+    def _release(self, call_id: int) -> None:
+        with self._calls:
+            self._running.discard(call_id)
+            self._overdue.discard(call_id)
+            self._calls.notify_all()
+
+    def _abandon(self, future: Future[list[str]], call_id: int) -> None:
+        if future.cancel():
+            self._release(call_id)
+            return
+        with self._calls:
+            if call_id in self._running:
+                self._overdue.add(call_id)
+
+    def _call(self, provider: BatchAIProvider, call_id: int, batch: list[str]) -> list[str]:
+        try:
+            return provider(list(batch))
+        finally:
+            # Before the result is set, so the caller finds the worker free.
+            self._release(call_id)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Worker threads do not survive fork(), so each process gets its own pool.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ai-categorizer")
+            self._executor_pid = os.getpid()
+            with self._calls:
+                self._running.clear()
+                self._overdue.clear()
+        return self._executor
 
-    return DEFAULT_CATEGORY
+    def _keyword(self, description: str) -> str:
+        return (self.matcher or DEFAULT_MATCHER).match(description.lower().strip()) or DEFAULT_CATEGORY
 
 
 def generate_monthly_insight(total_income: Decimal, total_expense: Decimal, top_category: str) -> str:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import queue
+import threading
+from collections.abc import Callable
+
+from .ai import BatchCategorizer
+from .models import Transaction
+from .repositories import TransactionRepository
+
+CategoryListener = Callable[[int, Transaction, str], None]
+
+
+class CategorizationQueue:
+    """Refine provisional expense categories in background worker threads.
+
+    Writes store the expense immediately with a keyword category marked
+    `pending` and `submit` it here. Workers drain the queue in batches, ask
+    the categorizer (and its AI provider) for the final category, update the
+    row and notify `on_update`. Rows whose refinement fails stay pending in
+    the database and are picked up again by `resume_pending`.
+    """
+
+    def __init__(
+        self,
+        categorizer: BatchCategorizer,
+        repository: TransactionRepository,
+        on_update: CategoryListener | None = None,
+        workers: int = 2,
+        batch_size: int = 32,
+    ) -> None:
+        self.categorizer = categorizer
+        self.repository = repository
+        self.on_update = on_update
+        self.workers = workers
+        self.batch_size = batch_size
+        self._queue: queue.Queue[tuple[int, Transaction]] = queue.Queue()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def submit(self, user_id: int, txn: Transaction) -> None:
+        self._ensure_workers()
+        self._queue.put((user_id, txn))
+
+    def resume_pending(self, limit: int = 10_000) -> int:
+        """Re-queue transactions left pending by a previous run."""
+
+        rows = self.repository.list_pending_categorizations(limit)
+        for user_id, txn in rows:
+            self.submit(user_id, txn)
+        return len(rows)
+
+    def join(self) -> None:
+        """Block until every submitted transaction was processed."""
+
+        self._queue.join()
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            # Threads do not survive fork(); forked workers start their own.
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"categorizer-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._refine(batch)
+            except Exception:
+                # The rows stay pending in the database; resume_pending() retries them.
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _refine(self, batch: list[tuple[int, Transaction]]) -> None:
+        results = self.categorizer.resolve([txn.description for _, txn in batch])
+        for (user_id, txn), (category, answered) in zip(batch, results):
+            # Keyword fallbacks are what the row already holds: keep it pending.
+            if txn.id is None or not answered:
+                continue
+            self.repository.update_category(txn.id, category)
+            if self.on_update:
+                self.on_update(user_id, txn, category)
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import csv
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+
+from .ai import categorize_transaction
+from .models import MAX_AMOUNT, Transaction, TransactionType
+from .repositories import TransactionRepository
+
+SUPPORTED_FORMATS = ("csv", "ofx")
+
+CSV_COLUMNS: dict[str, tuple[str, ...]] = {
+    "date": ("date", "data"),
+    "description": ("description", "descricao", "descrição", "historico", "histórico", "memo"),
+    "amount": ("amount", "valor", "value"),
+    "type": ("type", "tipo"),
+}
+
+TYPE_ALIASES: dict[str, TransactionType] = {
+    "income": TransactionType.INCOME,
+    "entrada": TransactionType.INCOME,
+    "receita": TransactionType.INCOME,
+    "credit": TransactionType.INCOME,
+    "crédito": TransactionType.INCOME,
+    "credito": TransactionType.INCOME,
+    "expense": TransactionType.EXPENSE,
+    "saída": TransactionType.EXPENSE,
+    "saida": TransactionType.EXPENSE,
+    "despesa": TransactionType.EXPENSE,
+    "debit": TransactionType.EXPENSE,
+    "débito": TransactionType.EXPENSE,
+    "debito": TransactionType.EXPENSE,
+}
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+# Digits with optional thousands separators ("1.234.567" or "1,234,567"),
+# then an optional decimal separator with at most two digits.
+_AMOUNT = re.compile(
+    r"(?P<sign>[+-]?)(?P<integer>\d{1,3}(?P<group>[.,])\d{3}(?:(?P=group)\d{3})*|\d+)"
+    r"(?:(?P<point>[.,])(?P<fraction>\d{1,2}))?"
+)
+
+
+@dataclass(slots=True)
+class StatementEntry:
+    amount: Decimal
+    description: str
+    date: date
+    type: TransactionType
+
+
+@dataclass(slots=True)
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+
+
+class ImportInterrupted(ValueError):
+    """An import that stopped on bad input; `result` counts the rows already stored."""
+
+    def __init__(self, message: str, result: ImportResult) -> None:
+        super().__init__(message)
+        self.result = result
+
+
+def _parse_amount(raw: str) -> Decimal:
+    """Parse "1.234,56" (Brazilian exports) or "1,234.56"; raise `ValueError` otherwise.
+
+    Amounts with more than two decimal places, a lone "1.234" that could be
+    read either way, non-finite values and amounts beyond `MAX_AMOUNT` are
+    rejected.
+    """
+
+    text = raw.replace("R$", "").replace(" ", "").replace("\xa0", "").strip()
+    match = _AMOUNT.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid amount: {raw!r}")
+    group, point = match["group"], match["point"]
+    if group is not None and (group == point or (point is None and match["integer"].count(group) == 1)):
+        raise ValueError(f"invalid amount: {raw!r}")
+    integer = match["integer"].replace(group, "") if group else match["integer"]
+    fraction = f".{match['fraction']}" if match["fraction"] else ""
+    amount = Decimal(f"{match['sign']}{integer}{fraction}")
+    if abs(amount) > MAX_AMOUNT:
+        raise ValueError(f"amount out of range: {raw!r}")
+    return amount
+
+
+def _parse_date(raw: str) -> date:
+    text = raw.strip()
+    if "/" in text:
+        return datetime.strptime(text, "%d/%m/%Y").date()
+    return date.fromisoformat(text[:10])
+
+
+def _entry(amount: Decimal, description: str, when: date, txn_type: TransactionType | None) -> StatementEntry | None:
+    description = description.strip()
+    if not description:
+        return None
+    if txn_type is None:
+        txn_type = TransactionType.EXPENSE if amount < 0 else TransactionType.INCOME
+    return StatementEntry(amount=abs(amount), description=description, date=when, type=txn_type)
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[StatementEntry | None]:
+    """Yield one entry per CSV row, or `None` for rows that cannot be read.
+
+    The header decides the columns (English or Portuguese names) and whether
+    `,` or `;` separates them. Without a `type` column the sign of the amount
+    tells expenses from income.
+    """
+
+    iterator = iter(lines)
+    first_line = next(iterator, None)
+    if first_line is None:
+        return
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    reader = csv.reader(chain([first_line], iterator), delimiter=delimiter)
+    rows = _csv_rows(reader)
+    header = next(rows)
+
+    positions: dict[str, int] = {}
+    for index, name in enumerate(header):
+        normalized = name.strip().lower()
+        for field, aliases in CSV_COLUMNS.items():
+            if normalized in aliases and field not in positions:
+                positions[field] = index
+    if not {"date", "description", "amount"} <= positions.keys():
+        raise ValueError("O CSV precisa das colunas data, descrição e valor.")
+
+    for row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            txn_type = None
+            if "type" in positions:
+                txn_type = TYPE_ALIASES.get(row[positions["type"]].strip().lower())
+            yield _entry(
+                _parse_amount(row[positions["amount"]]),
+                row[positions["description"]],
+                _parse_date(row[positions["date"]]),
+                txn_type,
+            )
+        except (IndexError, InvalidOperation, ValueError):
+            yield None
+
+
+def _csv_rows(reader: Iterator[list[str]]) -> Iterator[list[str]]:
+    # A malformed file (an oversized field, for one) cannot be resynchronized
+    # row by row: stop with the same error type as a bad header.
+    try:
+        yield from reader
+    except csv.Error as exc:
+        raise ValueError(f"Não foi possível ler o CSV na linha {reader.line_num}: {exc}.") from exc  # type: ignore[attr-defined]
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[StatementEntry | None]:
+    """Yield one entry per `<STMTTRN>` block of an OFX (SGML or XML) statement."""
+
+    current: dict[str, str] | None = None
+    for line in lines:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if current is not None:
+                    # SGML files may omit closing tags, so a new block ends the previous one.
+                    yield _ofx_entry(current)
+                current = None if closing else {}
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+    if current is not None:
+        yield _ofx_entry(current)
+
+
+def _ofx_entry(fields: dict[str, str]) -> StatementEntry | None:
+    try:
+        amount = _parse_amount(fields["TRNAMT"])
+        posted = fields["DTPOSTED"]
+        when = date(int(posted[0:4]), int(posted[4:6]), int(posted[6:8]))
+    except (KeyError, InvalidOperation, ValueError):
+        return None
+    return _entry(amount, fields.get("MEMO") or fields.get("NAME", ""), when, None)
+
+
+CategorizeBatch = Callable[[list[str]], list[str]]
+
+
+def _keyword_batch(descriptions: list[str]) -> list[str]:
+    return [categorize_transaction(description) for description in descriptions]
+
+
+def categorize_entries(
+    entries: Iterable[StatementEntry],
+    batch_size: int = 1000,
+    categorize: CategorizeBatch = _keyword_batch,
+) -> Iterator[Transaction]:
+    """Turn statement entries into transactions, categorizing one batch at a time.
+
+    `categorize` receives each batch's distinct expense descriptions in a
+    single call (see `BatchCategorizer.categorize`).
+    """
+
+    iterator = iter(entries)
+    while batch := list(islice(iterator, batch_size)):
+        descriptions = list(dict.fromkeys(entry.description for entry in batch if entry.type is TransactionType.EXPENSE))
+        categories = dict(zip(descriptions, categorize(descriptions))) if descriptions else {}
+        for entry in batch:
+            yield Transaction(
+                amount=entry.amount,
+                description=entry.description,
+                date=entry.date,
+                category="Receita" if entry.type is TransactionType.INCOME else categories[entry.description],
+                type=entry.type,
+            )
+
+
+def import_statement(
+    repository: TransactionRepository,
+    user_id: int,
+    lines: Iterable[str],
+    fmt: str = "csv",
+    chunk_size: int = 1000,
+    categorize: CategorizeBatch = _keyword_batch,
+) -> ImportResult:
+    """Stream a CSV or OFX statement into the repository in chunked transactions.
+
+    Each chunk commits on its own, so a statement that turns out to be
+    unreadable partway keeps the rows before it; the `ImportInterrupted`
+    raised then says how many.
+    """
+
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError("Formato não suportado. Use csv ou ofx.")
+
+    result = ImportResult()
+    parser = parse_csv if fmt == "csv" else parse_ofx
+
+    def valid_entries() -> Iterator[StatementEntry]:
+        for entry in parser(lines):
+            if entry is None:
+                result.skipped += 1
+            else:
+                yield entry
+
+    transactions = categorize_entries(valid_entries(), chunk_size, categorize)
+    try:
+        while chunk := list(islice(transactions, chunk_size)):
+            result.imported += repository.insert_many(user_id, chunk, chunk_size)
+    except (ValueError, InvalidOperation) as exc:
+        raise ImportInterrupted(str(exc), result) from exc
+    return result
@@ -1,21 +1,67 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import functools
+import threading
+from collections.abc import Callable, Iterable, Iterator
 from datetime import date
 from decimal import Decimal
+from typing import TypeVar
 
 from .ai import categorize_transaction, generate_monthly_insight
-from .models import MonthlySummary, Transaction, TransactionType
+from .models import CENT, CategoryStatus, MonthlySummary, Transaction, TransactionType
+
+MonthKey = tuple[int, int]
+
+ZERO = Decimal("0")
+
+
+def iter_months(start: MonthKey, end: MonthKey) -> Iterator[MonthKey]:
+    """Every (year, month) from `start` to `end`, both included."""
+
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _label(key: MonthKey) -> str:
+    return f"{key[0]:04d}-{key[1]:02d}"
+
+
+_Method = TypeVar("_Method", bound=Callable)
+
+
+def locked(method: _Method) -> _Method:
+    """Run a `Ledger` method while holding the ledger's lock."""
+
+    @functools.wraps(method)
+    def wrapper(self: Ledger, *args: object, **kwargs: object) -> object:
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
 
 
 class Ledger:
+    """Transactions of one user with running per-month rollups.
+
+    A cached ledger is shared by request threads and the categorization
+    queue: every public method holds `lock` (reentrant), and callers that
+    combine several reads into one view hold it around all of them.
+    """
+
     def __init__(self) -> None:
+        self.lock = threading.RLock()
         self._transactions: list[Transaction] = []
+        self._by_month: dict[MonthKey, list[Transaction]] = {}
+        self._reset_rollups()
 
     @property
+    @locked
     def transactions(self) -> tuple[Transaction, ...]:
         return tuple(self._transactions)
 
+    @locked
     def add_income(self, amount: Decimal, description: str, when: date) -> Transaction:
         txn = Transaction(
             amount=amount,
@@ -24,54 +70,174 @@ class Ledger:
             category="Receita",
             type=TransactionType.INCOME,
         )
-        self._transactions.append(txn)
+        self._append(txn)
         return txn
 
-    def add_expense(self, amount: Decimal, description: str, when: date) -> Transaction:
+    @locked
+    def add_expense(self, amount: Decimal, description: str, when: date, category: str | None = None) -> Transaction:
         txn = Transaction(
             amount=amount,
             description=description,
             date=when,
-            category=categorize_transaction(description),
+            category=category if category is not None else categorize_transaction(description),
             type=TransactionType.EXPENSE,
         )
-        self._transactions.append(txn)
+        self._append(txn)
         return txn
 
+    @locked
     def clear(self) -> None:
         self._transactions.clear()
+        self._by_month.clear()
+        self._reset_rollups()
 
+    @locked
     def record_transaction(self, txn: Transaction) -> None:
-        self._transactions.append(txn)
+        self._append(txn)
 
-    def monthly_summary(self, year: int, month: int) -> MonthlySummary:
-        income = Decimal("0")
-        expense = Decimal("0")
-        for txn in self._transactions:
-            if txn.date.year == year and txn.date.month == month:
-                if txn.type is TransactionType.INCOME:
-                    income += txn.amount
-                else:
-                    expense += txn.amount
+    @locked
+    def record_transactions(self, transactions: Iterable[Transaction]) -> None:
+        for txn in transactions:
+            self._append(txn)
+
+    @locked
+    def recategorize(self, txn_id: int, when: date, category: str) -> bool:
+        """Set the final category of a stored expense and move its amount between category totals."""
+
+        key = (when.year, when.month)
+        for txn in self._by_month.get(key, ()):
+            if txn.id != txn_id:
+                continue
+            if txn.type is TransactionType.EXPENSE and txn.category != category:
+                self._move_expense(key, txn.category, category, txn.amount)
+            txn.category = category
+            txn.category_status = CategoryStatus.FINAL
+            return True
+        return False
 
+    @locked
+    def transactions_for(self, year: int, month: int) -> tuple[Transaction, ...]:
+        return tuple(self._by_month.get((year, month), ()))
+
+    @locked
+    def expense_by_category(self, year: int, month: int) -> dict[str, Decimal]:
+        return dict(self._expense_by_category.get((year, month), {}))
+
+    @locked
+    def monthly_summary(self, year: int, month: int) -> MonthlySummary:
+        key = (year, month)
         return MonthlySummary(
             month=f"{year:04d}-{month:02d}",
-            total_income=income,
-            total_expense=expense,
+            total_income=self._income_by_month.get(key, ZERO),
+            total_expense=self._expense_by_month.get(key, ZERO),
         )
 
+    @locked
     def top_expense_category(self, year: int, month: int) -> str:
-        totals: dict[str, Decimal] = defaultdict(lambda: Decimal("0"))
-        for txn in self._transactions:
-            if txn.type is TransactionType.EXPENSE and txn.date.year == year and txn.date.month == month:
-                totals[txn.category] += txn.amount
-
+        totals = self._expense_by_category.get((year, month))
         if not totals:
             return "Sem gastos"
 
         return max(totals.items(), key=lambda item: item[1])[0]
 
+    @locked
+    def monthly_series(self, start: MonthKey, end: MonthKey) -> list[MonthlySummary]:
+        """One summary per month of the range, empty months included.
+
+        Read from the monthly rollups, so the cost grows with the number of
+        months, not with the number of transactions.
+        """
+
+        return [self.monthly_summary(*key) for key in iter_months(start, end)]
+
+    @locked
+    def range_summary(self, start: MonthKey, end: MonthKey) -> MonthlySummary:
+        income = expense = ZERO
+        for key in iter_months(start, end):
+            income += self._income_by_month.get(key, ZERO)
+            expense += self._expense_by_month.get(key, ZERO)
+        return MonthlySummary(month=f"{_label(start)}/{_label(end)}", total_income=income, total_expense=expense)
+
+    @locked
+    def category_breakdown(self, start: MonthKey, end: MonthKey) -> dict[str, Decimal]:
+        """Expense totals per category over the range, largest first."""
+
+        totals: dict[str, Decimal] = {}
+        for key in iter_months(start, end):
+            for category, amount in self._expense_by_category.get(key, {}).items():
+                totals[category] = totals.get(category, ZERO) + amount
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+    @locked
+    def rolling_averages(self, start: MonthKey, end: MonthKey, window: int = 3) -> list[MonthlySummary]:
+        """Average income and expense of the `window` months ending at each month of the range.
+
+        Months before `start` fill the first windows, so every point averages
+        exactly `window` months. Averages are rounded to cents.
+        """
+
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        first = start
+        for _ in range(window - 1):
+            first = (first[0] - 1, 12) if first[1] == 1 else (first[0], first[1] - 1)
+
+        divisor = Decimal(window)
+        keys = list(iter_months(first, end))
+        income = expense = ZERO
+        averages: list[MonthlySummary] = []
+        for index, key in enumerate(keys):
+            income += self._income_by_month.get(key, ZERO)
+            expense += self._expense_by_month.get(key, ZERO)
+            if index >= window:
+                dropped = keys[index - window]
+                income -= self._income_by_month.get(dropped, ZERO)
+                expense -= self._expense_by_month.get(dropped, ZERO)
+            if index >= window - 1:
+                averages.append(
+                    MonthlySummary(
+                        month=_label(key),
+                        total_income=(income / divisor).quantize(CENT),
+                        total_expense=(expense / divisor).quantize(CENT),
+                    )
+                )
+        return averages
+
+    @locked
     def monthly_insight(self, year: int, month: int) -> str:
         summary = self.monthly_summary(year, month)
         top_category = self.top_expense_category(year, month)
         return generate_monthly_insight(summary.total_income, summary.total_expense, top_category)
+
+    def _reset_rollups(self) -> None:
+        # Running per-month rollups, kept in sync by `_roll_up`, so period
+        # queries never rescan the whole history.
+        self._income_by_month: dict[MonthKey, Decimal] = {}
+        self._expense_by_month: dict[MonthKey, Decimal] = {}
+        self._expense_by_category: dict[MonthKey, dict[str, Decimal]] = {}
+
+    def _append(self, txn: Transaction) -> None:
+        key = (txn.date.year, txn.date.month)
+        self._store(key, txn)
+        self._roll_up(key, txn.type, txn.category, txn.amount)
+
+    def _store(self, key: MonthKey, txn: Transaction) -> None:
+        self._transactions.append(txn)
+        self._by_month.setdefault(key, []).append(txn)
+
+    def _roll_up(self, key: MonthKey, txn_type: TransactionType, category: str, amount: Decimal) -> None:
+        if txn_type is TransactionType.INCOME:
+            self._income_by_month[key] = self._income_by_month.get(key, ZERO) + amount
+        else:
+            self._expense_by_month[key] = self._expense_by_month.get(key, ZERO) + amount
+            categories = self._expense_by_category.setdefault(key, {})
+            categories[category] = categories.get(category, ZERO) + amount
+
+    def _move_expense(self, key: MonthKey, old: str, new: str, amount: Decimal) -> None:
+        totals = self._expense_by_category[key]
+        remaining = totals[old] - amount
+        if remaining:
+            totals[old] = remaining
+        else:
+            del totals[old]
+        totals[new] = totals.get(new, ZERO) + amount
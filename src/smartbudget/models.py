@@ -2,15 +2,34 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
 from enum import Enum
 
+CENT = Decimal("0.01")
+# Largest absolute amount accepted from forms and statements: sums of many
+# such amounts in cents stay far from SQLite's 64-bit integer limit.
+MAX_AMOUNT = Decimal("1000000000")
+
+
+def to_cents(amount: Decimal) -> int:
+    """Exact integer number of cents for `amount` (banker's rounding)."""
+    return int(amount.quantize(CENT, rounding=ROUND_HALF_EVEN).scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
 
 class TransactionType(str, Enum):
     INCOME = "income"
     EXPENSE = "expense"
 
 
+class CategoryStatus(str, Enum):
+    PENDING = "pending"
+    FINAL = "final"
+
+
 @dataclass(slots=True)
 class Transaction:
     amount: Decimal
@@ -18,6 +37,8 @@ class Transaction:
     date: date
     category: str
     type: TransactionType
+    id: int | None = None
+    category_status: CategoryStatus = CategoryStatus.FINAL
 
 
 @dataclass(slots=True)
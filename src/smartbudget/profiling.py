@@ -0,0 +1,217 @@
+"""Opt-in profiling of the live server, written to disk for offline analysis.
+
+`StackSampler` records the Python stacks of every thread of the process at
+a fixed interval and keeps aggregated counts in the collapsed format read
+by flame graph tools (`flamegraph.pl`, speedscope, inferno):
+
+    smartbudget.web.app:SmartBudgetHandler.do_GET;smartbudget.web.app:render_dashboard_chunks 42
+
+`RequestProfiler` runs `cProfile` around single requests instead, for a
+deterministic view of one slow call. Both are disabled unless configured.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import CodeType, FrameType
+
+# Library code a thread blocks in, whatever it is waiting for.
+WAIT_MODULES = frozenset({"queue", "selectors", "socket", "threading"})
+# Callers of those waits that mean "no work to do": stacks of threads idle
+# there are dropped. A request blocked in `Event.wait` or `future.result()`
+# is a slow wait, not an idle thread, and is kept.
+IDLE_FRAMES = frozenset(
+    {
+        ("concurrent.futures.thread", "_worker"),  # executor worker between tasks
+        ("socketserver", "BaseServer.serve_forever"),  # accept loop
+        ("http.server", "BaseHTTPRequestHandler.handle_one_request"),  # keep-alive connection between requests
+        ("asyncio.base_events", "BaseEventLoop._run_once"),  # event loop with nothing ready
+        ("smartbudget.categorization_queue", "CategorizationQueue._work"),  # empty categorization queue
+    }
+)
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".tmp")
+    partial.write_text(text, encoding="utf-8")
+    os.replace(partial, path)
+
+
+class StackSampler:
+    """Sample the stacks of all threads every `interval` seconds.
+
+    Counts accumulate for the life of the sampler and are rewritten to
+    `<output_dir>/stacks-<pid>.txt` every `flush_interval` seconds and on
+    `stop()`, so a report survives a worker that is killed. Each process
+    must start its own sampler (after forking).
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        interval: float = 0.01,
+        flush_interval: float = 30.0,
+        idle_frames: frozenset[tuple[str, str]] = IDLE_FRAMES,
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.idle_frames = idle_frames
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        return self.output_dir / f"stacks-{os.getpid()}.txt"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopped.set()
+        thread.join()
+        self.dump()
+
+    def sample(self) -> None:
+        """Record the current stack of every other thread once."""
+
+        sampler = threading.get_ident()
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == sampler:
+                continue
+            if self._idle(frame):
+                continue
+            names = []
+            while frame is not None:
+                names.append(self._label(frame))
+                frame = frame.f_back
+            names.reverse()
+            stacks.append(";".join(names))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def collapsed(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stacks)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def dump(self) -> Path:
+        """Write the aggregated stacks, hottest first, and return the file."""
+
+        stacks = sorted(self.collapsed().items(), key=lambda item: (-item[1], item[0]))
+        path = self.path
+        _write_atomically(path, "".join(f"{stack} {count}\n" for stack, count in stacks))
+        return path
+
+    def _idle(self, frame: FrameType) -> bool:
+        """Whether the thread at `frame` (its innermost) is waiting for work."""
+
+        caller: FrameType | None = frame
+        while caller is not None and caller.f_globals.get("__name__") in WAIT_MODULES:
+            caller = caller.f_back
+        if caller is None:
+            return False
+        return (caller.f_globals.get("__name__"), caller.f_code.co_qualname) in self.idle_frames
+
+    def _label(self, frame: FrameType) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+        return label
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stopped.wait(self.interval):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.dump()
+                next_flush = time.monotonic() + self.flush_interval
+
+
+class RequestProfiler:
+    """Run `cProfile` around requests of chosen users.
+
+    Enabled once `output_dir` is set. Each profiled call leaves a binary
+    `.prof` file (for `pstats`, snakeviz or gprof2dot) and a `.txt` summary
+    of the functions with the highest cumulative time. Only one call is
+    profiled at a time; concurrent requests run unprofiled.
+    """
+
+    def __init__(self, output_dir: str | Path | None = None, admins: Iterable[int] = (), top: int = 40) -> None:
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.admins = frozenset(admins)
+        self.top = top
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_dir is not None
+
+    def allows(self, user_id: int) -> bool:
+        return self.output_dir is not None and user_id in self.admins
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[Path | None]:
+        """Profile the block; yields the report path, or `None` when skipped."""
+
+        if self.output_dir is None or not self._lock.acquire(blocking=False):
+            yield None
+            return
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-") or "request"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self._sequence)}-{slug}.prof"
+        path = self.output_dir / name
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield path
+        finally:
+            # Failed requests are often the interesting ones: write them too.
+            profile.disable()
+            try:
+                self._write(profile, path, label)
+            finally:
+                self._lock.release()
+
+    def _write(self, profile: cProfile.Profile, path: Path, label: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        summary = io.StringIO()
+        summary.write(f"{label}\n\n")
+        pstats.Stats(profile, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        _write_atomically(path.with_suffix(".txt"), summary.getvalue())
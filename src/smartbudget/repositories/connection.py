@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from smartbudget.metrics import DB_SECONDS
+
+
+class ConnectionPool:
+    """Reuse SQLite connections across requests and threads.
+
+    A connection is checked out by exactly one thread at a time and returned
+    to an idle list afterwards, so short-lived request threads stop paying
+    for `sqlite3.connect` and PRAGMA setup on every call. At most
+    `max_connections` are open at once: further callers wait up to
+    `busy_timeout` seconds for one to be returned, then get
+    `sqlite3.OperationalError`. Up to `max_idle` are kept open between
+    calls. Connections are opened in WAL mode so readers never block the
+    single writer. A forked child process starts with an empty pool of its own.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        busy_timeout: float = 5.0,
+        max_idle: int = 8,
+        max_connections: int = 32,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        cached_statements: int = 256,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        self.max_idle = max_idle
+        self.max_connections = max_connections
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._pid = os.getpid()
+        self._inherited: list[sqlite3.Connection] = []
+
+    @contextmanager
+    def connection(self, operation: str = "other") -> Iterator[sqlite3.Connection]:
+        """Check out a connection; commit on success and roll back on error.
+
+        The time from checkout to commit is recorded under `operation`.
+        """
+
+        started = time.perf_counter()
+        conn = self._acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._release(conn)
+            DB_SECONDS.observe(time.perf_counter() - started, operation)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _acquire(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            self._after_fork()
+        if not self._slots.acquire(timeout=self.busy_timeout):
+            raise sqlite3.OperationalError(f"no free connection after {self.busy_timeout}s ({self.max_connections} in use)")
+        try:
+            with self._lock:
+                if self._idle:
+                    return self._idle.pop()
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _after_fork(self) -> None:
+        # SQLite connections must not cross fork(). Keep the parent's objects
+        # referenced (closing them here could disturb the parent) and start fresh.
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._inherited.extend(self._idle)
+        self._idle = []
+        self._pid = os.getpid()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    return
+            conn.close()
+        finally:
+            self._slots.release()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
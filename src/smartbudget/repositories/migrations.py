@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable
+from decimal import Decimal
+
+from smartbudget.models import to_cents
+
+Migration = Callable[[sqlite3.Connection], None]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def _base_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount TEXT NOT NULL,
+            description TEXT NOT NULL,
+            date TEXT NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """
+    )
+    if "user_id" not in _columns(conn, "transactions"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN user_id INTEGER")
+
+
+def _amount_cents(conn: sqlite3.Connection) -> None:
+    if "amount_cents" not in _columns(conn, "transactions"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN amount_cents INTEGER")
+    # Converted with to_cents rather than SQL ROUND, so legacy amounts with
+    # more than two decimals round half-even like every row written since.
+    # Batches walk the ids, keeping memory flat on large tables.
+    last_id = 0
+    while rows := conn.execute(
+        "SELECT id, amount FROM transactions WHERE amount_cents IS NULL AND id > ? ORDER BY id LIMIT 10000",
+        (last_id,),
+    ).fetchall():
+        conn.executemany(
+            "UPDATE transactions SET amount_cents = ? WHERE id = ?",
+            [(to_cents(Decimal(str(amount))), txn_id) for txn_id, amount in rows],
+        )
+        last_id = rows[-1][0]
+
+
+def _user_date_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions(user_id, date)")
+
+
+def _category_cache(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS category_cache (
+            description_key TEXT PRIMARY KEY,
+            category TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _category_status(conn: sqlite3.Connection) -> None:
+    if "category_status" not in _columns(conn, "transactions"):
+        conn.execute("ALTER TABLE transactions ADD COLUMN category_status TEXT NOT NULL DEFAULT 'final'")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_pending ON transactions(id) WHERE category_status = 'pending'"
+    )
+
+
+def _sessions(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            token TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            user_name TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)")
+
+
+def _data_version(conn: sqlite3.Connection) -> None:
+    if "data_version" not in _columns(conn, "users"):
+        conn.execute("ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0")
+
+
+def _user_id_index(conn: sqlite3.Connection) -> None:
+    # Entries are ordered by rowid within a user, so loading a whole history
+    # in id order reads the table sequentially and needs no sort.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions(user_id)")
+
+
+def _provider_categories_only(conn: sqlite3.Connection) -> None:
+    # Keyword fallbacks used to be cached too and would now pass for provider
+    # answers; the two cannot be told apart, so let the provider answer again.
+    conn.execute("DELETE FROM category_cache")
+
+
+# Append-only: position N (1-based) upgrades a database from user_version N-1 to N.
+MIGRATIONS: tuple[Migration, ...] = (
+    _base_schema,
+    _amount_cents,
+    _user_date_index,
+    _category_cache,
+    _category_status,
+    _sessions,
+    _data_version,
+    _user_id_index,
+    _provider_categories_only,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations one transaction at a time and return the schema version.
+
+    The version is re-read under a write lock before each step, so several
+    processes opening the same database concurrently never apply a step twice.
+    """
+
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                conn.commit()
+                return version
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
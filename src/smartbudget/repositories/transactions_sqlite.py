@@ -4,49 +4,116 @@ import hashlib
 import hmac
 import os
 import sqlite3
+from collections.abc import Iterable
 from datetime import date
 from decimal import Decimal
+from itertools import islice
 from pathlib import Path
 
-from smartbudget.models import Transaction, TransactionType
+from smartbudget.models import CategoryStatus, MonthlySummary, Transaction, TransactionType, from_cents, to_cents
+
+from .connection import ConnectionPool
+from .migrations import migrate
+
+
+_INSERT_TRANSACTION = """
+    INSERT INTO transactions (user_id, amount, amount_cents, description, date, category, type, category_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+_BUMP_DATA_VERSION = "UPDATE users SET data_version = data_version + 1 WHERE id = ?"
+
+
+def _insert_values(user_id: int, txn: Transaction) -> tuple[object, ...]:
+    return (
+        user_id,
+        str(txn.amount),
+        to_cents(txn.amount),
+        txn.description,
+        txn.date.isoformat(),
+        txn.category,
+        txn.type.value,
+        txn.category_status.value,
+    )
+
+
+# Type and status come back as 0/1 integers: small ints are shared objects,
+# so the rows carry two fewer strings to allocate and compare.
+_TRANSACTION_COLUMNS = "id, amount, description, date, category, type = 'expense', category_status = 'pending'"
+_TYPES = (TransactionType.INCOME, TransactionType.EXPENSE)
+_STATUSES = (CategoryStatus.FINAL, CategoryStatus.PENDING)
+
+
+def _transactions_from_rows(rows: Iterable[tuple]) -> list[Transaction]:
+    """Build transactions from rows selected with `_TRANSACTION_COLUMNS`.
+
+    Long histories repeat the same days, amounts and texts over and over, so
+    each distinct value is parsed once per call and the (immutable) result
+    shared by every transaction that has it. Every field is displayed or
+    summed somewhere, so there is nothing to gain from decoding lazily.
+    """
+
+    amounts: dict[str, Decimal] = {}
+    dates: dict[str, date] = {}
+    texts: dict[str, str] = {}
+    transactions: list[Transaction] = []
+    append = transactions.append
+    for txn_id, amount, description, txn_date, category, expense, pending in rows:
+        value = amounts.get(amount)
+        if value is None:
+            value = amounts[amount] = Decimal(amount)
+        when = dates.get(txn_date)
+        if when is None:
+            when = dates[txn_date] = date.fromisoformat(txn_date)
+        append(
+            Transaction(
+                value,
+                texts.setdefault(description, description),
+                when,
+                texts.setdefault(category, category),
+                _TYPES[expense],
+                txn_id,
+                _STATUSES[pending],
+            )
+        )
+    return transactions
+
+
+def _month_bounds(year: int, month: int) -> tuple[str, str]:
+    # Compared as ISO strings: "YYYY-13-01" sorts after every December date of
+    # the year, so December 9999 needs no year 10000.
+    return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month + 1:02d}-01"
 
 
 class TransactionRepository:
-    def __init__(self, db_path: str = "data/smartbudget.db") -> None:
+    def __init__(
+        self,
+        db_path: str = "data/smartbudget.db",
+        busy_timeout: float = 5.0,
+        pool_size: int = 8,
+        max_connections: int = 32,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+    ) -> None:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = ConnectionPool(
+            self.db_path,
+            busy_timeout=busy_timeout,
+            max_idle=pool_size,
+            max_connections=max_connections,
+            journal_mode=journal_mode,
+            synchronous=synchronous,
+        )
         self.init_db()
 
     def init_db(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    password_hash TEXT NOT NULL
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    amount TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                )
-                """
-            )
+        with self._pool.connection("init_db") as conn:
+            migrate(conn)
 
-            columns = [row[1] for row in conn.execute("PRAGMA table_info(transactions)").fetchall()]
-            if "user_id" not in columns:
-                conn.execute("ALTER TABLE transactions ADD COLUMN user_id INTEGER")
+    def close(self) -> None:
+        self._pool.close()
 
     def _hash_password(self, password: str) -> str:
         salt = os.urandom(16).hex()
@@ -66,7 +133,7 @@ class TransactionRepository:
             return False, "Preencha nome, e-mail e senha (mínimo 4 caracteres)."
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection("create_user") as conn:
                 cursor = conn.execute(
                     "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
                     (name.strip(), email.strip().lower(), self._hash_password(password)),
@@ -76,7 +143,7 @@ class TransactionRepository:
             return False, "Este e-mail já está cadastrado."
 
     def authenticate_user(self, email: str, password: str) -> tuple[bool, str | tuple[int, str]]:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection("authenticate_user") as conn:
             row = conn.execute(
                 "SELECT id, name, password_hash FROM users WHERE email = ?",
                 (email.strip().lower(),),
@@ -92,54 +159,183 @@ class TransactionRepository:
         return True, (user_id, name)
 
     def get_user(self, user_id: int) -> tuple[int, str] | None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection("get_user") as conn:
             row = conn.execute("SELECT id, name FROM users WHERE id = ?", (user_id,)).fetchone()
         return row if row else None
 
+    def create_session(self, token: str, user_id: int, user_name: str, expires_at: float) -> None:
+        with self._pool.connection("create_session") as conn:
+            conn.execute(
+                "INSERT INTO sessions (token, user_id, user_name, expires_at) VALUES (?, ?, ?, ?)",
+                (token, user_id, user_name, expires_at),
+            )
+
+    def get_session(self, token: str, now: float) -> tuple[int, str] | None:
+        with self._pool.connection("get_session") as conn:
+            row = conn.execute(
+                "SELECT user_id, user_name FROM sessions WHERE token = ? AND expires_at > ?",
+                (token, now),
+            ).fetchone()
+        return row if row else None
+
+    def delete_session(self, token: str) -> None:
+        with self._pool.connection("delete_session") as conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def purge_expired_sessions(self, now: float) -> int:
+        with self._pool.connection("purge_expired_sessions") as conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+
+    def data_version(self, user_id: int) -> int:
+        """Counter bumped by every write to the user's transactions, in any process."""
+
+        with self._pool.connection("data_version") as conn:
+            row = conn.execute("SELECT data_version FROM users WHERE id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
     def insert_transaction(self, user_id: int, txn: Transaction) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection("insert_transaction") as conn:
+            cursor = conn.execute(_INSERT_TRANSACTION, _insert_values(user_id, txn))
+            conn.execute(_BUMP_DATA_VERSION, (user_id,))
+        txn.id = cursor.lastrowid
+
+    def insert_many(self, user_id: int, transactions: Iterable[Transaction], chunk_size: int = 1000) -> int:
+        """Insert transactions with one `executemany` per chunk and return how many were stored.
+
+        `transactions` is consumed lazily, so arbitrarily long iterators are
+        written with bounded memory; each chunk commits on its own.
+        """
+
+        stored = 0
+        iterator = iter(transactions)
+        while chunk := list(islice(iterator, chunk_size)):
+            with self._pool.connection("insert_many") as conn:
+                conn.executemany(_INSERT_TRANSACTION, [_insert_values(user_id, txn) for txn in chunk])
+                conn.execute(_BUMP_DATA_VERSION, (user_id,))
+            stored += len(chunk)
+        return stored
+
+    def list_transactions(self, user_id: int, period: tuple[int, int] | None = None) -> list[Transaction]:
+        query = f"SELECT {_TRANSACTION_COLUMNS} FROM transactions WHERE user_id = ?"
+        params: tuple[object, ...] = (user_id,)
+        if period is not None:
+            query += " AND date >= ? AND date < ?"
+            params += _month_bounds(*period)
+
+        with self._pool.connection("list_transactions") as conn:
+            # Decode straight from the cursor: no list of raw rows is built,
+            # and each row's strings are freed as soon as it is converted.
+            return _transactions_from_rows(conn.execute(query + " ORDER BY id ASC", params))
+
+    def list_transactions_page(
+        self,
+        user_id: int,
+        period: tuple[int, int],
+        limit: int,
+        before: tuple[date, int] | None = None,
+    ) -> list[Transaction]:
+        """Up to `limit` transactions of the month, newest first (by date, then id).
+
+        `before` is the `(date, id)` of the last row of the previous page. The
+        page starts right after it with an index range scan, so deep pages cost
+        the same as the first one, and rows inserted meanwhile never shift it.
+        """
+
+        start, end = _month_bounds(*period)
+        query = f"SELECT {_TRANSACTION_COLUMNS} FROM transactions WHERE user_id = ? AND date >= ? AND date < ?"
+        params: tuple[object, ...] = (user_id, start, end)
+        if before is not None:
+            query += " AND (date, id) < (?, ?)"
+            params += (before[0].isoformat(), before[1])
+
+        with self._pool.connection("list_transactions_page") as conn:
+            rows = conn.execute(query + " ORDER BY date DESC, id DESC LIMIT ?", params + (limit,)).fetchall()
+
+        return _transactions_from_rows(rows)
+
+    def update_category(self, txn_id: int, category: str, status: CategoryStatus = CategoryStatus.FINAL) -> None:
+        with self._pool.connection("update_category") as conn:
             conn.execute(
+                "UPDATE transactions SET category = ?, category_status = ? WHERE id = ?",
+                (category, status.value, txn_id),
+            )
+            conn.execute(
+                "UPDATE users SET data_version = data_version + 1 WHERE id = (SELECT user_id FROM transactions WHERE id = ?)",
+                (txn_id,),
+            )
+
+    def list_pending_categorizations(self, limit: int = 1000) -> list[tuple[int, Transaction]]:
+        """Transactions still waiting for an AI category, oldest first, with their user id."""
+
+        with self._pool.connection("list_pending_categorizations") as conn:
+            rows = conn.execute(
+                f"""
+                SELECT user_id, {_TRANSACTION_COLUMNS}
+                FROM transactions
+                WHERE category_status = 'pending'
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        transactions = _transactions_from_rows(row[1:] for row in rows)
+        return [(row[0], txn) for row, txn in zip(rows, transactions)]
+
+    def monthly_totals(self, user_id: int, year: int, month: int) -> MonthlySummary:
+        with self._pool.connection("monthly_totals") as conn:
+            income, expense = conn.execute(
                 """
-                INSERT INTO transactions (user_id, amount, description, date, category, type)
-                VALUES (?, ?, ?, ?, ?, ?)
+                SELECT
+                    COALESCE(SUM(CASE WHEN type = 'income' THEN amount_cents END), 0),
+                    COALESCE(SUM(CASE WHEN type = 'expense' THEN amount_cents END), 0)
+                FROM transactions
+                WHERE user_id = ? AND date >= ? AND date < ?
                 """,
-                (
-                    user_id,
-                    str(txn.amount),
-                    txn.description,
-                    txn.date.isoformat(),
-                    txn.category,
-                    txn.type.value,
-                ),
-            )
+                (user_id, *_month_bounds(year, month)),
+            ).fetchone()
+
+        return MonthlySummary(
+            month=f"{year:04d}-{month:02d}",
+            total_income=from_cents(income),
+            total_expense=from_cents(expense),
+        )
 
-    def list_transactions(self, user_id: int) -> list[Transaction]:
-        with sqlite3.connect(self.db_path) as conn:
+    def category_totals(self, user_id: int, year: int, month: int) -> dict[str, Decimal]:
+        """Expense totals per category for the month, largest first."""
+        with self._pool.connection("category_totals") as conn:
             rows = conn.execute(
                 """
-                SELECT amount, description, date, category, type
+                SELECT category, SUM(amount_cents) AS total
                 FROM transactions
-                WHERE user_id = ?
-                ORDER BY id ASC
+                WHERE user_id = ? AND type = 'expense' AND date >= ? AND date < ?
+                GROUP BY category
+                ORDER BY total DESC
                 """,
-                (user_id,),
+                (user_id, *_month_bounds(year, month)),
             ).fetchall()
 
-        return [
-            Transaction(
-                amount=Decimal(amount),
-                description=description,
-                date=date.fromisoformat(txn_date),
-                category=category,
-                type=TransactionType(txn_type),
+        return {category: from_cents(total) for category, total in rows}
+
+    def load_category(self, key: str) -> str | None:
+        with self._pool.connection("load_category") as conn:
+            row = conn.execute("SELECT category FROM category_cache WHERE description_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def save_category(self, key: str, category: str) -> None:
+        with self._pool.connection("save_category") as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO category_cache (description_key, category) VALUES (?, ?)",
+                (key, category),
             )
-            for amount, description, txn_date, category, txn_type in rows
-        ]
 
     def clear_transactions(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection("clear_transactions") as conn:
             conn.execute("DELETE FROM transactions")
 
+    def clear_category_cache(self) -> None:
+        with self._pool.connection("clear_category_cache") as conn:
+            conn.execute("DELETE FROM category_cache")
+
     def clear_users(self) -> None:
-        with sqlite3.connect(self.db_path) as conn:
+        with self._pool.connection("clear_users") as conn:
             conn.execute("DELETE FROM users")
@@ -1,3 +1,4 @@
+from .aio import run_async
 from .app import run
 
-__all__ = ["run"]
+__all__ = ["run", "run_async"]
@@ -0,0 +1,302 @@
+"""asyncio serving mode for the web app.
+
+Connections are handled by an asyncio event loop, so thousands of idle
+keep-alive clients cost a socket each rather than a thread each. Every
+request is dispatched to the unchanged `SmartBudgetHandler` routes inside a
+bounded thread pool, which is where the blocking SQLite work happens.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.client import HTTPException, HTTPMessage, parse_headers
+
+from smartbudget.web import app
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Bodies of every route but the import are read whole before dispatch.
+MAX_BUFFERED_BODY_BYTES = 1024 * 1024
+# Longest wait for the next piece of a request body before giving up on it.
+BODY_READ_TIMEOUT = 30.0
+# Longest a streamed import may take to arrive, however steadily it trickles in.
+IMPORT_BODY_TIMEOUT = 300.0
+IMPORT_PATH = "/api/import"
+# Responses are sent in pieces of about this size; smaller ones in one write.
+RESPONSE_FLUSH_BYTES = 64 * 1024
+# Longest wait for a client to take a piece of a response.
+SEND_TIMEOUT = 30.0
+
+BAD_REQUEST = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+PAYLOAD_TOO_LARGE = b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+INTERNAL_ERROR = b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+NOT_IMPLEMENTED = b"HTTP/1.1 501 Not Implemented\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+class _StreamBody(io.RawIOBase):
+    """The `length` bytes of a request body, read from the event loop by a worker thread.
+
+    Only what the handler asks for is pulled off the connection, so a large
+    upload occupies the stream's buffer rather than memory per request. The
+    whole body must arrive before `deadline` (a `time.monotonic()` value).
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, loop: asyncio.AbstractEventLoop, length: int, deadline: float
+    ) -> None:
+        self._reader = reader
+        self._loop = loop
+        self._deadline = deadline
+        self.remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        if self.remaining <= 0:
+            return 0
+        left = self._deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError("request body took too long to arrive")
+        read = asyncio.wait_for(
+            self._reader.read(min(len(buffer), self.remaining)), min(BODY_READ_TIMEOUT, left)
+        )
+        data = asyncio.run_coroutine_threadsafe(read, self._loop).result()
+        if not data:
+            raise ConnectionError("client closed the connection before sending the whole body")
+        size = len(data)
+        buffer[:size] = data
+        self.remaining -= size
+        return size
+
+
+class _ResponseStream(io.RawIOBase):
+    """Response bytes for one connection, sent from the event loop in pieces.
+
+    Writes are held until `RESPONSE_FLUSH_BYTES` accumulate, so small
+    responses still leave in one write, while a streamed body reaches the
+    client while it is produced. Sending waits for the transport to drain,
+    which holds a producer back when the client reads slowly.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, loop: asyncio.AbstractEventLoop) -> None:
+        self._writer = writer
+        self._loop = loop
+        self._pending: list[bytes] = []
+        self._size = 0
+        self.sent = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._pending.append(bytes(data))
+        self._size += len(data)
+        if self._size >= RESPONSE_FLUSH_BYTES:
+            self.sent = True
+            asyncio.run_coroutine_threadsafe(self._send(self.take()), self._loop).result()
+        return len(data)
+
+    def take(self) -> bytes:
+        """Return and forget the bytes not sent yet."""
+
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._size = 0
+        return data
+
+    async def _send(self, data: bytes) -> None:
+        self._writer.write(data)
+        await asyncio.wait_for(self._writer.drain(), SEND_TIMEOUT)
+
+
+class _BufferedHandler(app.SmartBudgetHandler):
+    """`SmartBudgetHandler` reading a request body and writing to a `_ResponseStream`."""
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(
+        self,
+        command: str,
+        path: str,
+        version: str,
+        headers: HTTPMessage,
+        body: io.BufferedIOBase,
+        response: _ResponseStream,
+        peer: tuple,
+    ) -> None:
+        # BaseHTTPRequestHandler.__init__ would start reading a socket; set up its state directly.
+        self.command = command
+        self.path = path
+        self.request_version = version
+        self.requestline = f"{command} {path} {version}"
+        self.headers = headers
+        self.rfile = body
+        self.wfile = response
+        self.client_address = peer
+        self.server = None  # type: ignore[assignment]
+        self.close_connection = False
+        self.status = 0
+        self.framed = False
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        self.status = int(code)
+        super().send_response(code, message)
+
+    def send_header(self, keyword: str, value: str) -> None:
+        super().send_header(keyword, value)
+        keyword = keyword.lower()
+        if keyword == "content-length" or (keyword == "transfer-encoding" and value.lower() == "chunked"):
+            self.framed = True
+
+    def dispatch(self) -> None:
+        method = getattr(self, f"do_{self.command}", None)
+        if method is None:
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED, f"Unsupported method ({self.command!r})")
+        else:
+            method()
+
+
+def _dispatch(
+    command: str,
+    path: str,
+    version: str,
+    headers: HTTPMessage,
+    body: io.BufferedIOBase,
+    response: _ResponseStream,
+    peer: tuple,
+) -> bool:
+    """Run the routes for one request; returns whether the connection must close after it."""
+
+    handler = _BufferedHandler(command, path, version, headers, body, response, peer)
+    handler.dispatch()
+    # Without a length or chunked framing the client can only find the end of
+    # the body when the connection closes; 304 and 204 responses have no body.
+    framed = handler.framed or handler.status in (204, 304)
+    return handler.close_connection or not framed
+
+
+def _content_length(headers: HTTPMessage) -> int | None:
+    """The declared body length, or `None` when the framing cannot be trusted."""
+
+    values = set(headers.get_all("Content-Length") or ("0",))
+    if len(values) != 1:
+        return None
+    value = values.pop().strip()
+    # int() would also take signs, spaces and underscores.
+    return int(value) if value.isdigit() else None
+
+
+def _wants_keep_alive(version: str, headers: HTTPMessage) -> bool:
+    connection = (headers.get("Connection") or "").lower()
+    if version == "HTTP/1.1":
+        return connection != "close"
+    return connection == "keep-alive"
+
+
+class AsyncServer:
+    """Serve `SmartBudgetHandler` over asyncio connections.
+
+    Request bodies are read whole on the event loop before a worker is
+    taken, so a client that stalls mid-body holds only its own socket. The
+    import is the exception: its body is streamed to the handler as it reads
+    it, on a separate pool of `import_workers` threads and under a total
+    deadline, so slow uploads can only hold up other imports. Responses are
+    sent as the handler writes them, so a streamed dashboard is never held
+    whole in memory. Requests with `Transfer-Encoding` are refused with 501.
+    """
+
+    def __init__(self, max_workers: int = 16, keepalive_timeout: float = 75.0, import_workers: int = 2) -> None:
+        self.keepalive_timeout = keepalive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="smartbudget-aio")
+        self.import_executor = ThreadPoolExecutor(
+            max_workers=import_workers, thread_name_prefix="smartbudget-aio-import"
+        )
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername") or ("", 0)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    raw_head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    return
+
+                request_line, _, raw_headers = raw_head.partition(b"\r\n")
+                try:
+                    command, path, version = request_line.decode("latin-1").split()
+                    headers = parse_headers(io.BytesIO(raw_headers))
+                except (ValueError, HTTPException):
+                    writer.write(BAD_REQUEST)
+                    return
+                if "Transfer-Encoding" in headers:
+                    # Chunked request bodies are not decoded; guessing where one
+                    # ends would let it be read as the next request.
+                    writer.write(NOT_IMPLEMENTED)
+                    return
+                length = _content_length(headers)
+                if length is None:
+                    writer.write(BAD_REQUEST)
+                    return
+                if length > MAX_BODY_BYTES:
+                    writer.write(PAYLOAD_TOO_LARGE)
+                    return
+
+                stream = None
+                if command == "POST" and path.partition("?")[0] == IMPORT_PATH:
+                    stream = _StreamBody(reader, loop, length, time.monotonic() + IMPORT_BODY_TIMEOUT)
+                    executor, body = self.import_executor, io.BufferedReader(stream)
+                elif length > MAX_BUFFERED_BODY_BYTES:
+                    writer.write(PAYLOAD_TOO_LARGE)
+                    return
+                else:
+                    data = await asyncio.wait_for(reader.readexactly(length), BODY_READ_TIMEOUT)
+                    executor, body = self.executor, io.BytesIO(data)
+
+                response = _ResponseStream(writer, loop)
+                try:
+                    must_close = await loop.run_in_executor(
+                        executor, _dispatch, command, path, version, headers, body, response, peer
+                    )
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+                    # Once part of the response is out, closing is the only signal left.
+                    if not response.sent:
+                        writer.write(INTERNAL_ERROR)
+                    return
+                writer.write(response.take())
+                await writer.drain()
+                # Whatever the handler left unread would be parsed as the next request.
+                if must_close or (stream and stream.remaining) or not _wants_keep_alive(version, headers):
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return
+        finally:
+            writer.close()
+
+
+async def serve(host: str = "0.0.0.0", port: int = 8000, max_workers: int = 16) -> None:
+    server = await AsyncServer(max_workers=max_workers).start(host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def run_async(host: str = "0.0.0.0", port: int = 8000, max_workers: int = 16) -> None:
+    """Serve the app from one asyncio event loop; `max_workers` bounds concurrent DB work."""
+
+    app.prepare_worker(0)
+    print(f"IA Finance (asyncio) rodando em http://{host}:{port}")
+    try:
+        asyncio.run(serve(host, port, max_workers))
+    finally:
+        app.finish_worker(0)
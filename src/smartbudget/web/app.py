@@ -1,27 +1,125 @@
 from __future__ import annotations
 
-import secrets
+import base64
+import binascii
+import hmac
+import io
 import json
+import os
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from html import escape
 from http import HTTPStatus
 from http.cookies import SimpleCookie
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from urllib.parse import parse_qs, urlparse
+from pathlib import Path
+from typing import TypeVar
+from urllib.parse import ParseResult, parse_qs, urlparse
 
+from smartbudget.ai import BatchCategorizer, CategoryCache, categorize_transaction, generate_monthly_insight
+from smartbudget.categorization_queue import CategorizationQueue
+from smartbudget.importers import SUPPORTED_FORMATS, ImportInterrupted, import_statement
 from smartbudget.ledger import Ledger
+from smartbudget.metrics import REGISTRY, RENDER_SECONDS, REQUEST_SECONDS
+from smartbudget.models import CENT, MAX_AMOUNT, CategoryStatus, MonthlySummary, Transaction, TransactionType
+from smartbudget.profiling import RequestProfiler, StackSampler
 from smartbudget.repositories import TransactionRepository
+from smartbudget.web.cache import LedgerCache
+from smartbudget.web.compression import Compressor
+from smartbudget.web.http_cache import (
+    PRIVATE_CACHE_CONTROL,
+    STATIC_CACHE_CONTROL,
+    dashboard_etag,
+    etag_matches,
+    load_static,
+    not_modified_since,
+)
+from smartbudget.web.prefork import serve_prefork
+from smartbudget.web.render_cache import RenderCache
+from smartbudget.web.sessions import MemorySessionStore, SessionStore, SQLiteSessionStore
+from smartbudget.web.templates import Chunks, Template
 
-ledger = Ledger()
 repository = TransactionRepository()
-sessions: dict[str, int] = {}
+# Pass `ledger_factory=ColumnarLedger` (smartbudget.columnar) when users keep
+# long histories: it stores each transaction in a fraction of the memory.
+ledger_cache = LedgerCache(repository.list_transactions, version_loader=repository.data_version)
+category_cache = CategoryCache(store=repository)
+# Deployments with a model backend assign `batch_categorizer.provider` at
+# startup (wrap one-description providers with `smartbudget.ai.batched`). A
+# provider must time out its own network calls: a hung call holds a worker.
+batch_categorizer = BatchCategorizer(cache=category_cache)
+# Swap for SQLiteSessionStore(repository) when several processes serve the app.
+sessions: SessionStore = MemorySessionStore()
+# Rendered views per (user, period), dropped by the writes that touch them.
+render_cache = RenderCache()
+# Lower `compressor.level` to save CPU or raise it to save bandwidth; level 0 disables compression.
+compressor = Compressor()
+# Requests sent with `X-Profile: 1` by the users in `profiler.admins` are run
+# under cProfile once `profiler.output_dir` is set (see `configure_profiling`).
+profiler = RequestProfiler()
+# When set, every server process samples its thread stacks into collapsed files.
+sampler: StackSampler | None = None
+# /api/metrics answers only requests bearing this token (see `configure_metrics`);
+# without one the endpoint is disabled.
+metrics_token: str | None = None
 
 TYPE_LABELS = {
     "income": "Entrada",
     "expense": "Saída",
 }
 
+PENDING_BADGE = " <small class='categoria-pendente' title='Categoria provisória'>(em análise)</small>"
+
+STATIC_ASSETS = {
+    "/static/styles.css": load_static("styles.css", "text/css; charset=utf-8"),
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+HTML_PAGE_SIZE = 100
+# Unpaginated dashboards with more rows than this are streamed instead of cached.
+STREAM_THRESHOLD = 1000
+STREAM_BATCH = 256
+MAX_REPORT_MONTHS = 120
+MAX_ROLLING_WINDOW = 24
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Request paths become metric labels; anything else is counted as "other"
+# so scanners probing random URLs cannot grow the label set.
+ROUTES = frozenset(
+    {
+        "/",
+        "/api/health",
+        "/api/session",
+        "/api/metrics",
+        "/api/dashboard",
+        "/api/dashboard/summary",
+        "/api/reports",
+        "/api/transactions",
+        "/api/register",
+        "/api/login",
+        "/api/import",
+        "/register",
+        "/login",
+        "/logout",
+        "/transactions",
+        *STATIC_ASSETS,
+    }
+)
+
+RESPONSES = REGISTRY.counter("smartbudget_http_responses_total", "HTTP responses sent, by status code.", ("status",))
+REGISTRY.gauge("smartbudget_ledger_cache_users", "Ledgers held in memory.", lambda: len(ledger_cache))
+REGISTRY.gauge("smartbudget_render_cache_entries", "Rendered views held in memory.", lambda: len(render_cache))
+REGISTRY.gauge(
+    "smartbudget_render_cache_bytes", "Size of the rendered views held in memory.", lambda: render_cache.stats()["bytes"]
+)
+REGISTRY.gauge(
+    "smartbudget_render_cache_hit_ratio", "Render cache lookups answered from memory.", lambda: render_cache.stats()["hit_ratio"]
+)
+REGISTRY.gauge("smartbudget_category_cache_entries", "Categorized descriptions held in memory.", lambda: len(category_cache))
+
 
 def _money(value: Decimal) -> str:
     return f"R$ {value:.2f}"
@@ -36,7 +134,7 @@ def _parse_period(period: str | None) -> tuple[int, int]:
         year_str, month_str = period.split("-", maxsplit=1)
         year = int(year_str)
         month = int(month_str)
-        if 1 <= month <= 12:
+        if 1 <= year <= 9999 and 1 <= month <= 12:
             return year, month
     except ValueError:
         pass
@@ -44,6 +142,57 @@ def _parse_period(period: str | None) -> tuple[int, int]:
     return today.year, today.month
 
 
+def _parse_month(value: str) -> tuple[int, int]:
+    try:
+        year_str, month_str = value.split("-", maxsplit=1)
+        year, month = int(year_str), int(month_str)
+    except ValueError:
+        year, month = 0, 0
+    if not (1 <= year <= 9999 and 1 <= month <= 12):
+        raise ValueError("Período inválido. Use o formato AAAA-MM.")
+    return year, month
+
+
+def encode_cursor(txn: Transaction) -> str:
+    """Opaque pagination cursor pointing right after `txn` in newest-first order."""
+
+    raw = f"{txn.date.isoformat()}|{txn.id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        day, txn_id = raw.split("|", maxsplit=1)
+        return date.fromisoformat(day), int(txn_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Cursor de paginação inválido.") from exc
+
+
+def _page_size(limit: str | None) -> int:
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(limit)
+    except ValueError as exc:
+        raise ValueError("O parâmetro limit deve ser um número inteiro.") from exc
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def transactions_page(
+    user_id: int, year: int, month: int, limit: int, cursor: str | None = None
+) -> tuple[list[Transaction], str | None]:
+    """One newest-first page of the month and the cursor of the next one (`None` on the last page)."""
+
+    before = _decode_cursor(cursor) if cursor else None
+    # One extra row tells whether another page exists without a COUNT query.
+    rows = repository.list_transactions_page(user_id, (year, month), limit + 1, before)
+    if len(rows) <= limit:
+        return rows, None
+    del rows[limit:]
+    return rows, encode_cursor(rows[-1])
+
+
 def _get_session_token(handler: BaseHTTPRequestHandler) -> str | None:
     raw = handler.headers.get("Cookie")
     if not raw:
@@ -58,25 +207,84 @@ def _get_user(handler: BaseHTTPRequestHandler) -> tuple[int, str] | None:
     token = _get_session_token(handler)
     if not token:
         return None
-    user_id = sessions.get(token)
-    if not user_id:
-        return None
-    return repository.get_user(user_id)
+    # The store keeps the user's name with the session, so no users query is needed.
+    return sessions.get(token)
 
 
-def load_transactions_from_db(user_id: int) -> None:
-    ledger.clear()
-    for txn in repository.list_transactions(user_id):
-        ledger.record_transaction(txn)
+def _data_version(user_id: int) -> int:
+    if ledger_cache.validate:
+        # Other processes may have written: the stored counter is the only shared truth.
+        return repository.data_version(user_id)
+    version = ledger_cache.version(user_id)
+    if version is None:
+        ledger_cache.get(user_id)
+        version = ledger_cache.version(user_id)
+    return version or 0
 
 
-def _expense_chart(year: int, month: int) -> tuple[str, str]:
-    palette = ["#ff6b6b", "#4ecdc4", "#ffe66d", "#5f6caf", "#f7a072", "#5aa9e6", "#c77dff"]
-    totals: dict[str, Decimal] = {}
+def _view_etag(user_id: int, parsed: ParseResult) -> str:
+    resource = f"{parsed.path}?{parsed.query}"
+    return dashboard_etag(user_id, _data_version(user_id), resource, date.today().isoformat())
+
+
+_R = TypeVar("_R", bytes, tuple[bytes, ...])
+
+
+def _cached_view(user_id: int, period: tuple[int, int], variant: str, render: Callable[[], _R]) -> _R:
+    version = _data_version(user_id)
+    cached = render_cache.get(user_id, period, variant, version)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+    started = time.perf_counter()
+    rendered = render()
+    RENDER_SECONDS.observe(time.perf_counter() - started, variant.partition("|")[0])
+    render_cache.put(user_id, period, variant, version, rendered)
+    return rendered
 
-    for txn in ledger.transactions:
-        if txn.date.year == year and txn.date.month == month and txn.type.value == "expense":
-            totals[txn.category] = totals.get(txn.category, Decimal("0")) + txn.amount
+
+def _written(user_id: int, when: date) -> None:
+    """Record one stored change dated `when` in the caches of this process."""
+
+    ledger_cache.mark_written(user_id)
+    version = ledger_cache.version(user_id)
+    if version is None:
+        render_cache.invalidate_user(user_id)
+    else:
+        render_cache.invalidate_period(user_id, (when.year, when.month), version)
+
+
+def _apply_refined_category(user_id: int, txn: Transaction, category: str) -> None:
+    ledger = ledger_cache.peek(user_id)
+    if ledger is None or txn.id is None:
+        render_cache.invalidate_user(user_id)
+        return
+    with ledger.lock:
+        moved = ledger.recategorize(txn.id, txn.date, category)
+        if moved:
+            _written(user_id, txn.date)
+    if not moved:
+        ledger_cache.invalidate(user_id)
+        render_cache.invalidate_user(user_id)
+
+
+categorization_queue = CategorizationQueue(batch_categorizer, repository, on_update=_apply_refined_category)
+
+
+def _provisional_category(description: str) -> tuple[str, CategoryStatus]:
+    """Category to store right away; `PENDING` means the AI provider will refine it later."""
+
+    if batch_categorizer.provider is None:
+        return batch_categorizer.categorize([description])[0], CategoryStatus.FINAL
+    # The cache only holds provider answers.
+    cached = category_cache.get(description)
+    if cached is not None:
+        return cached, CategoryStatus.FINAL
+    return categorize_transaction(description), CategoryStatus.PENDING
+
+
+def _expense_chart(ledger: Ledger, year: int, month: int) -> tuple[str, str]:
+    palette = ["#ff6b6b", "#4ecdc4", "#ffe66d", "#5f6caf", "#f7a072", "#5aa9e6", "#c77dff"]
+    totals = ledger.expense_by_category(year, month)
 
     total_expense = sum(totals.values(), Decimal("0"))
     if total_expense <= 0:
@@ -105,9 +313,7 @@ def _expense_chart(year: int, month: int) -> tuple[str, str]:
     return gradient, "".join(legend_items)
 
 
-def render_auth_page(message: str | None = None) -> str:
-    message_html = f"<p class='error'>{escape(message)}</p>" if message else ""
-    return f"""<!doctype html>
+AUTH_TEMPLATE = Template("""<!doctype html>
 <html lang='pt-BR'>
 <head>
   <meta charset='utf-8'>
@@ -125,7 +331,7 @@ def render_auth_page(message: str | None = None) -> str:
     <section class='grid'>
       <article class='card'>
         <h2>Entrar</h2>
-        {message_html}
+        $message_html
         <form method='post' action='/login' class='form'>
           <label>E-mail
             <input type='email' name='email' required>
@@ -155,7 +361,18 @@ def render_auth_page(message: str | None = None) -> str:
     </section>
   </main>
 </body>
-</html>"""
+</html>""")
+_AUTH_PAGE = b"".join(AUTH_TEMPLATE.render_chunks({"message_html": ""}))
+
+
+def render_auth_chunks(message: str | None = None) -> Chunks:
+    if not message:
+        return [_AUTH_PAGE]
+    return AUTH_TEMPLATE.render_chunks({"message_html": f"<p class='error'>{escape(message)}</p>"})
+
+
+def render_auth_page(message: str | None = None) -> str:
+    return b"".join(render_auth_chunks(message)).decode("utf-8")
 
 
 def render_health_payload() -> bytes:
@@ -188,70 +405,159 @@ def render_auth_result_payload(ok: bool, message: str, user_id: int | None = Non
     return json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
 
-def render_dashboard_payload(user_id: int, period: str | None = None) -> bytes:
-    load_transactions_from_db(user_id)
-    year, month = _parse_period(period)
-    summary = ledger.monthly_summary(year, month)
-
-    transactions = []
-    for txn in ledger.transactions:
-        if txn.date.year == year and txn.date.month == month:
-            transactions.append(
-                {
-                    "date": txn.date.isoformat(),
-                    "description": txn.description,
-                    "category": txn.category,
-                    "type": txn.type.value,
-                    "amount": str(txn.amount),
-                }
-            )
+def _transaction_payload(txn: Transaction) -> dict[str, str]:
+    return {
+        "date": txn.date.isoformat(),
+        "description": txn.description,
+        "category": txn.category,
+        "type": txn.type.value,
+        "amount": str(txn.amount),
+        "category_status": txn.category_status.value,
+    }
+
+
+def _summary_fields(summary: MonthlySummary) -> dict[str, str]:
+    return {
+        "income": str(summary.total_income),
+        "expense": str(summary.total_expense),
+        "balance": str(summary.balance),
+    }
 
-    payload = {
+
+def _summary_payload(user_id: int, year: int, month: int) -> dict[str, object]:
+    ledger = ledger_cache.get(user_id)
+    with ledger.lock:
+        summary = ledger.monthly_summary(year, month)
+        top_category = ledger.top_expense_category(year, month)
+    return {
         "period": f"{year:04d}-{month:02d}",
-        "summary": {
-            "income": str(summary.total_income),
-            "expense": str(summary.total_expense),
-            "balance": str(summary.balance),
-        },
-        "top_category": ledger.top_expense_category(year, month),
-        "insight": ledger.monthly_insight(year, month),
-        "transactions": transactions,
+        "summary": _summary_fields(summary),
+        "top_category": top_category,
+        "insight": generate_monthly_insight(summary.total_income, summary.total_expense, top_category),
     }
 
-    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+def render_summary_payload(user_id: int, period: str | None = None) -> bytes:
+    year, month = _parse_period(period)
+
+    def render() -> bytes:
+        return json.dumps(_summary_payload(user_id, year, month), ensure_ascii=False).encode("utf-8")
+
+    return _cached_view(user_id, (year, month), "summary", render)
 
 
-def render_dashboard(user_name: str, user_id: int, error: str | None = None, period: str | None = None) -> str:
-    load_transactions_from_db(user_id)
+def render_transactions_payload(
+    user_id: int, period: str | None = None, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None
+) -> bytes:
     year, month = _parse_period(period)
-    period_value = f"{year:04d}-{month:02d}"
 
-    summary = ledger.monthly_summary(year, month)
-    top_category = ledger.top_expense_category(year, month)
-    insight = ledger.monthly_insight(year, month)
+    def render() -> bytes:
+        rows, next_cursor = transactions_page(user_id, year, month, limit, cursor)
+        payload = {
+            "period": f"{year:04d}-{month:02d}",
+            "transactions": [_transaction_payload(txn) for txn in rows],
+            "next_cursor": next_cursor,
+        }
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
-    expense_ratio = Decimal("0")
-    if summary.total_income > 0:
-        expense_ratio = ((summary.total_expense / summary.total_income) * Decimal("100")).quantize(Decimal("0.1"))
+    return _cached_view(user_id, (year, month), f"page|{limit}|{cursor or ''}", render)
 
-    status_text = "Saudável" if expense_ratio < 70 else "Atenção"
-    status_class = "status-bom" if expense_ratio < 70 else "status-alerta"
 
-    pie_gradient, pie_legend = _expense_chart(year, month)
+def render_dashboard_payload(
+    user_id: int, period: str | None = None, limit: int | None = None, cursor: str | None = None
+) -> bytes:
+    """Summary and rows of the month.
 
-    rows = "".join(
-        f"<tr><td>{txn.date}</td><td><span class='tipo tipo-{txn.type.value}'>{TYPE_LABELS[txn.type.value]}</span></td>"
-        f"<td>{escape(txn.category)}</td><td>{escape(txn.description)}</td>"
-        f"<td class='valor valor-{txn.type.value}'>{_money(txn.amount)}</td></tr>"
-        for txn in reversed(ledger.transactions)
-        if txn.date.year == year and txn.date.month == month
-    )
-    if not rows:
-        rows = '<tr><td colspan="5">Nenhuma transação cadastrada para o período selecionado.</td></tr>'
+    Without `limit` (or `cursor`) every row is returned, oldest first, as
+    before pagination existed. Otherwise `transactions` holds one
+    newest-first page and `next_cursor` points to the next one.
+    """
+
+    year, month = _parse_period(period)
+
+    def render() -> bytes:
+        payload = _summary_payload(user_id, year, month)
+        if limit is None and cursor is None:
+            rows = ledger_cache.get(user_id).transactions_for(year, month)
+            payload["transactions"] = [_transaction_payload(txn) for txn in rows]
+        else:
+            rows, next_cursor = transactions_page(user_id, year, month, limit or DEFAULT_PAGE_SIZE, cursor)
+            payload["transactions"] = [_transaction_payload(txn) for txn in rows]
+            payload["next_cursor"] = next_cursor
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    return _cached_view(user_id, (year, month), f"dashboard|{limit or ''}|{cursor or ''}", render)
+
+
+def render_reports_payload(
+    user_id: int, start: str | None = None, end: str | None = None, window: str | None = None
+) -> bytes:
+    """Month series, category breakdown and rolling averages over a range of months.
+
+    Defaults to the year to date with a 3-month window. Everything comes from
+    the ledger's monthly rollups, so a five-year range costs about as much
+    as a single month.
+    """
+
+    today = date.today()
+    last = _parse_month(end) if end else (today.year, today.month)
+    first = _parse_month(start) if start else (last[0], 1)
+    if first > last:
+        raise ValueError("O início do relatório deve ser anterior ao fim.")
+    months = (last[0] - first[0]) * 12 + last[1] - first[1] + 1
+    if months > MAX_REPORT_MONTHS:
+        raise ValueError(f"O relatório pode cobrir no máximo {MAX_REPORT_MONTHS} meses.")
+    try:
+        size = int(window) if window else 3
+    except ValueError as exc:
+        raise ValueError("O parâmetro window deve ser um número inteiro.") from exc
+    size = min(max(size, 1), MAX_ROLLING_WINDOW)
+
+    ledger = ledger_cache.get(user_id)
+    with ledger.lock:
+        payload = {
+            "start": f"{first[0]:04d}-{first[1]:02d}",
+            "end": f"{last[0]:04d}-{last[1]:02d}",
+            "window": size,
+            "totals": _summary_fields(ledger.range_summary(first, last)),
+            "months": [{"period": item.month, **_summary_fields(item)} for item in ledger.monthly_series(first, last)],
+            "rolling": [{"period": item.month, **_summary_fields(item)} for item in ledger.rolling_averages(first, last, size)],
+            "categories": [
+                {"category": category, "amount": str(amount)}
+                for category, amount in ledger.category_breakdown(first, last).items()
+            ],
+        }
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _iter_dashboard_json(user_id: int, year: int, month: int, rows: tuple[Transaction, ...]) -> Iterator[bytes]:
+    # Same bytes as json.dumps(payload) with the default separators.
+    head = json.dumps(_summary_payload(user_id, year, month), ensure_ascii=False)
+    yield (head[:-1] + ', "transactions": [').encode("utf-8")
+    for start in range(0, len(rows), STREAM_BATCH):
+        batch = ", ".join(
+            json.dumps(_transaction_payload(txn), ensure_ascii=False) for txn in rows[start : start + STREAM_BATCH]
+        )
+        yield (", " + batch if start else batch).encode("utf-8")
+    yield b"]}"
+
+
+def stream_dashboard_payload(user_id: int, period: str | None = None) -> Iterator[bytes] | None:
+    """Unpaginated dashboard JSON in pieces, for months above `STREAM_THRESHOLD` rows.
+
+    Returns `None` for smaller months, which `render_dashboard_payload`
+    renders (and caches) whole. Only one batch of rows is encoded at a time,
+    so memory stays flat however long the month is.
+    """
 
-    error_html = f'<p class="error">{escape(error)}</p>' if error else ""
+    year, month = _parse_period(period)
+    rows = ledger_cache.get(user_id).transactions_for(year, month)
+    if len(rows) <= STREAM_THRESHOLD:
+        return None
+    return _iter_dashboard_json(user_id, year, month, rows)
 
-    return f"""<!doctype html>
+
+DASHBOARD_TEMPLATE = Template("""<!doctype html>
 <html lang='pt-BR'>
 <head>
   <meta charset='utf-8'>
@@ -265,7 +571,7 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
       <h1>IA Finance</h1>
       <div class='user-area'>
         <button id='btn-config' type='button' class='ghost-btn'>Configurações</button>
-        <span>Olá, {escape(user_name)}</span>
+        <span>Olá, $user_name</span>
         <form method='post' action='/logout'><button type='submit' class='ghost-btn'>Sair</button></form>
       </div>
     </header>
@@ -291,7 +597,7 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
     <section class='card filter-card'>
       <form method='get' action='/' class='filter-form'>
         <label>Filtrar período
-          <input type='month' name='period' value='{period_value}'>
+          <input type='month' name='period' value='$period_value'>
         </label>
         <button type='submit'>Filtrar</button>
       </form>
@@ -300,23 +606,23 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
     <section class='grid metrics'>
       <article class='card destaque saldo-card'>
         <h2>Saldo do mês</h2>
-        <p class='big-value'>{_money(summary.balance)}</p>
-        <p class='muted'>Entrada total: <span class='valor valor-income'>{_money(summary.total_income)}</span></p>
+        <p class='big-value'>$balance</p>
+        <p class='muted'>Entrada total: <span class='valor valor-income'>$total_income</span></p>
       </article>
 
       <article class='card destaque gasto-card'>
         <h2>Gasto do mês</h2>
-        <p class='big-value valor valor-expense'>{_money(summary.total_expense)}</p>
-        <p class='muted'>Comprometido da entrada: {expense_ratio}%</p>
+        <p class='big-value valor valor-expense'>$total_expense</p>
+        <p class='muted'>Comprometido da entrada: $expense_ratio%</p>
       </article>
 
       <article class='card'>
         <h2>Indicadores</h2>
         <ul>
-          <li><strong>Categoria com maior gasto:</strong> {escape(top_category)}</li>
-          <li><strong>Status financeiro:</strong> <span class='{status_class}'>{status_text}</span></li>
+          <li><strong>Categoria com maior gasto:</strong> $top_category</li>
+          <li><strong>Status financeiro:</strong> <span class='$status_class'>$status_text</span></li>
         </ul>
-        <p class='insight'>{escape(insight)}</p>
+        <p class='insight'>$insight</p>
       </article>
     </section>
 
@@ -324,14 +630,14 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
       <article class='card'>
         <h2>Gastos</h2>
         <div class='chart-wrap'>
-          <div class='pie-chart' style='background:{pie_gradient}' aria-label='Gastos por categoria'></div>
-          <ul class='legend'>{pie_legend}</ul>
+          <div class='pie-chart' style='background:$pie_gradient' aria-label='Gastos por categoria'></div>
+          <ul class='legend'>$pie_legend</ul>
         </div>
       </article>
 
       <article class='card'>
         <h2>Nova transação</h2>
-        {error_html}
+        $error_html
         <form method='post' action='/transactions' class='form'>
           <label>Valor
             <input type='number' step='0.01' min='0' name='amount' required>
@@ -340,7 +646,7 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
             <input type='text' name='description' placeholder='Ex: Mercado, aluguel, salário...' required>
           </label>
           <label>Data
-            <input type='date' name='txn_date' value='{date.today().isoformat()}' required>
+            <input type='date' name='txn_date' value='$today' required>
           </label>
           <div class='type-buttons'>
             <button type='submit' name='transaction_type' value='expense' class='btn-expense'>Salvar saída</button>
@@ -356,28 +662,29 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
         <thead>
           <tr><th>Data</th><th>Tipo</th><th>Categoria</th><th>Descrição</th><th>Valor</th></tr>
         </thead>
-        <tbody>{rows}</tbody>
+        <tbody>$rows</tbody>
       </table>
+      $pagination
     </section>
   </main>
 
   <script>
     const KEY = 'ia_finance_settings';
-    const defaults = {{ theme: 'light', incomeColor: '#16a34a', expenseColor: '#dc2626' }};
-    const settings = Object.assign(defaults, JSON.parse(localStorage.getItem(KEY) || '{{}}'));
+    const defaults = { theme: 'light', incomeColor: '#16a34a', expenseColor: '#dc2626' };
+    const settings = Object.assign(defaults, JSON.parse(localStorage.getItem(KEY) || '{}'));
 
-    const applySettings = () => {{
+    const applySettings = () => {
       document.body.dataset.theme = settings.theme;
       document.documentElement.style.setProperty('--income-color', settings.incomeColor);
       document.documentElement.style.setProperty('--expense-color', settings.expenseColor);
       document.documentElement.style.setProperty('--status-good', settings.incomeColor);
-    }};
+    };
 
     applySettings();
 
     const panel = document.getElementById('config-panel');
     const btnConfig = document.getElementById('btn-config');
-    btnConfig.addEventListener('click', () => {{ panel.hidden = !panel.hidden; }});
+    btnConfig.addEventListener('click', () => { panel.hidden = !panel.hidden; });
 
     const themeSelect = document.getElementById('theme-select');
     const incomeColor = document.getElementById('income-color');
@@ -387,17 +694,117 @@ def render_dashboard(user_name: str, user_id: int, error: str | None = None, per
     incomeColor.value = settings.incomeColor;
     expenseColor.value = settings.expenseColor;
 
-    const persist = () => {{
+    const persist = () => {
       localStorage.setItem(KEY, JSON.stringify(settings));
       applySettings();
-    }};
+    };
 
-    themeSelect.addEventListener('change', (event) => {{ settings.theme = event.target.value; persist(); }});
-    incomeColor.addEventListener('input', (event) => {{ settings.incomeColor = event.target.value; persist(); }});
-    expenseColor.addEventListener('input', (event) => {{ settings.expenseColor = event.target.value; persist(); }});
+    themeSelect.addEventListener('change', (event) => { settings.theme = event.target.value; persist(); });
+    incomeColor.addEventListener('input', (event) => { settings.incomeColor = event.target.value; persist(); });
+    expenseColor.addEventListener('input', (event) => { settings.expenseColor = event.target.value; persist(); });
   </script>
 </body>
-</html>"""
+</html>""")
+
+
+# Slots that only depend on the user's data; the others are filled per request.
+_DASHBOARD_DATA_SLOTS = (
+    "period_value",
+    "balance",
+    "total_income",
+    "total_expense",
+    "expense_ratio",
+    "top_category",
+    "status_class",
+    "status_text",
+    "insight",
+    "pie_gradient",
+    "pie_legend",
+    "rows",
+    "pagination",
+)
+
+
+def _dashboard_fragments(user_id: int, year: int, month: int, cursor: str | None) -> tuple[bytes, ...]:
+    ledger = ledger_cache.get(user_id)
+    period_value = f"{year:04d}-{month:02d}"
+
+    # One consistent view of the rollups, even while the queue recategorizes.
+    with ledger.lock:
+        summary = ledger.monthly_summary(year, month)
+        top_category = ledger.top_expense_category(year, month)
+        pie_gradient, pie_legend = _expense_chart(ledger, year, month)
+    insight = generate_monthly_insight(summary.total_income, summary.total_expense, top_category)
+
+    expense_ratio = Decimal("0")
+    if summary.total_income > 0:
+        expense_ratio = ((summary.total_expense / summary.total_income) * Decimal("100")).quantize(Decimal("0.1"))
+
+    status_text = "Saudável" if expense_ratio < 70 else "Atenção"
+    status_class = "status-bom" if expense_ratio < 70 else "status-alerta"
+
+    if cursor:
+        try:
+            _decode_cursor(cursor)
+        except ValueError:
+            # A stale or mangled link falls back to the first page.
+            cursor = None
+    page, next_cursor = transactions_page(user_id, year, month, HTML_PAGE_SIZE, cursor)
+
+    rows = "".join(
+        f"<tr><td>{txn.date}</td><td><span class='tipo tipo-{txn.type.value}'>{TYPE_LABELS[txn.type.value]}</span></td>"
+        f"<td>{escape(txn.category)}{PENDING_BADGE if txn.category_status is CategoryStatus.PENDING else ''}</td>"
+        f"<td>{escape(txn.description)}</td>"
+        f"<td class='valor valor-{txn.type.value}'>{_money(txn.amount)}</td></tr>"
+        for txn in page
+    )
+    if not rows:
+        rows = '<tr><td colspan="5">Nenhuma transação cadastrada para o período selecionado.</td></tr>'
+
+    links = []
+    if cursor:
+        links.append(f"<a href='/?period={period_value}'>Mais recentes</a>")
+    if next_cursor:
+        links.append(f"<a href='/?period={period_value}&amp;cursor={next_cursor}'>Mais antigas</a>")
+    pagination = f"<nav class='paginacao'>{''.join(links)}</nav>" if links else ""
+
+    values = {
+        "period_value": period_value,
+        "balance": _money(summary.balance),
+        "total_income": _money(summary.total_income),
+        "total_expense": _money(summary.total_expense),
+        "expense_ratio": str(expense_ratio),
+        "top_category": escape(top_category),
+        "status_class": status_class,
+        "status_text": status_text,
+        "insight": escape(insight),
+        "pie_gradient": pie_gradient,
+        "pie_legend": pie_legend,
+        "rows": rows,
+        "pagination": pagination,
+    }
+    return tuple(values[name].encode("utf-8") for name in _DASHBOARD_DATA_SLOTS)
+
+
+def render_dashboard_chunks(
+    user_name: str, user_id: int, error: str | None = None, period: str | None = None, cursor: str | None = None
+) -> Chunks:
+    year, month = _parse_period(period)
+    fragments = _cached_view(
+        user_id, (year, month), f"html|{cursor or ''}", lambda: _dashboard_fragments(user_id, year, month, cursor)
+    )
+
+    values: dict[str, str | bytes] = dict(zip(_DASHBOARD_DATA_SLOTS, fragments))
+    values["user_name"] = escape(user_name)
+    values["error_html"] = f'<p class="error">{escape(error)}</p>' if error else ""
+    values["today"] = date.today().isoformat()
+    return DASHBOARD_TEMPLATE.render_chunks(values)
+
+
+def render_dashboard(
+    user_name: str, user_id: int, error: str | None = None, period: str | None = None, cursor: str | None = None
+) -> str:
+    return b"".join(render_dashboard_chunks(user_name, user_id, error, period, cursor)).decode("utf-8")
 
 
 def save_transaction(user_id: int, form_data: dict[str, list[str]]) -> str | None:
@@ -408,19 +815,63 @@ def save_transaction(user_id: int, form_data: dict[str, list[str]]) -> str | Non
         txn_date = date.fromisoformat(form_data.get("txn_date", [""])[0])
     except (InvalidOperation, ValueError):
         return "Verifique valor e data antes de salvar."
+    # Whole cents only, so the ledger and the SQL totals add up the same.
+    if not amount.is_finite() or abs(amount) > MAX_AMOUNT or amount != amount.quantize(CENT):
+        return "Verifique valor e data antes de salvar."
 
     if not description:
         return "A descrição é obrigatória."
 
     if txn_type == "income":
-        txn = ledger.add_income(amount, description, txn_date)
+        txn = Transaction(amount, description, txn_date, "Receita", TransactionType.INCOME)
     else:
-        txn = ledger.add_expense(amount, description, txn_date)
+        category, status = _provisional_category(description)
+        txn = Transaction(amount, description, txn_date, category, TransactionType.EXPENSE, category_status=status)
 
+    # Load the ledger before storing, so a cold load cannot already hold the new row.
+    ledger = ledger_cache.get(user_id)
     repository.insert_transaction(user_id, txn)
+    # Recorded only once stored, with its id: ledgers that copy transactions
+    # (ColumnarLedger) need it for later recategorization.
+    # Held until the version is bumped, so no view reads the new rollups under the old version.
+    with ledger.lock:
+        ledger.record_transaction(txn)
+        _written(user_id, txn.date)
+
+    if txn.category_status is CategoryStatus.PENDING:
+        categorization_queue.submit(user_id, txn)
     return None
 
 
+class _RequestBody(io.RawIOBase):
+    """Expose exactly `Content-Length` bytes of the socket as a readable stream."""
+
+    def __init__(self, stream: io.BufferedIOBase, length: int) -> None:
+        self._stream = stream
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        if self._remaining <= 0:
+            return 0
+        data = self._stream.read(min(len(buffer), self._remaining))
+        size = len(data)
+        buffer[:size] = data
+        self._remaining -= size
+        return size
+
+
+def _import_format(query: dict[str, list[str]], content_type: str | None) -> str:
+    requested = query.get("format", [""])[0].lower()
+    if requested:
+        return requested
+    if content_type and "ofx" in content_type.lower():
+        return "ofx"
+    return "csv"
+
+
 def _set_session_cookie(handler: BaseHTTPRequestHandler, token: str) -> None:
     handler.send_header("Set-Cookie", f"iafinance_session={token}; HttpOnly; Path=/; SameSite=Lax")
 
@@ -429,14 +880,52 @@ def _clear_session_cookie(handler: BaseHTTPRequestHandler) -> None:
     handler.send_header("Set-Cookie", "iafinance_session=; HttpOnly; Path=/; Max-Age=0; SameSite=Lax")
 
 
+def _route_label(path: str) -> str:
+    return path if path in ROUTES else "other"
+
+
 class SmartBudgetHandler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
+        self._dispatch("GET", self._route_get)
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch("POST", self._route_post)
 
+    def _dispatch(self, method: str, route: Callable[[ParseResult], None]) -> None:
+        started = time.perf_counter()
+        parsed = urlparse(self.path)
+        label = _route_label(parsed.path)
+        try:
+            if profiler.enabled and self.headers.get("X-Profile"):
+                user = _get_user(self)
+                if user and profiler.allows(user[0]):
+                    with profiler.profile(f"{method} {label} user {user[0]}"):
+                        route(parsed)
+                    return
+            route(parsed)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, label)
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        RESPONSES.inc(str(int(code)))
+        super().send_response(code, message)
+
+    def _route_get(self, parsed: ParseResult) -> None:
         if parsed.path == "/api/health":
             self._send_json(render_health_payload())
             return
 
+        if parsed.path == "/api/metrics":
+            if metrics_token is None:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            authorization = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {metrics_token}".encode("utf-8")):
+                self._send_json(json.dumps({"error": "unauthorized"}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.UNAUTHORIZED)
+                return
+            self._send_body(REGISTRY.render().encode("utf-8"), METRICS_CONTENT_TYPE, HTTPStatus.OK, None)
+            return
+
         if parsed.path == "/api/session":
             self._send_json(render_session_payload(_get_user(self)))
             return
@@ -449,8 +938,85 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
 
             query = parse_qs(parsed.query)
             period = query.get("period", [None])[0]
+            cursor = query.get("cursor", [None])[0]
+            user_id, _ = user
+            etag = _view_etag(user_id, parsed)
+            if self._not_modified(etag):
+                return
+            if "limit" not in query and cursor is None:
+                pieces = stream_dashboard_payload(user_id=user_id, period=period)
+                if pieces is not None:
+                    self._stream_json(pieces, etag=etag)
+                    return
+            try:
+                limit = _page_size(query["limit"][0]) if "limit" in query else None
+                body = render_dashboard_payload(user_id=user_id, period=period, limit=limit, cursor=cursor)
+            except ValueError as exc:
+                self._send_json(json.dumps({"error": str(exc)}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json(body, etag=etag)
+            return
+
+        if parsed.path == "/api/dashboard/summary":
+            user = _get_user(self)
+            if not user:
+                self._send_json(json.dumps({"error": "unauthorized"}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.UNAUTHORIZED)
+                return
+
+            period = parse_qs(parsed.query).get("period", [None])[0]
             user_id, _ = user
-            self._send_json(render_dashboard_payload(user_id=user_id, period=period))
+            etag = _view_etag(user_id, parsed)
+            if self._not_modified(etag):
+                return
+            self._send_json(render_summary_payload(user_id=user_id, period=period), etag=etag)
+            return
+
+        if parsed.path == "/api/reports":
+            user = _get_user(self)
+            if not user:
+                self._send_json(json.dumps({"error": "unauthorized"}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.UNAUTHORIZED)
+                return
+
+            query = parse_qs(parsed.query)
+            user_id, _ = user
+            etag = _view_etag(user_id, parsed)
+            if self._not_modified(etag):
+                return
+            try:
+                body = render_reports_payload(
+                    user_id,
+                    start=query.get("start", [None])[0],
+                    end=query.get("end", [None])[0],
+                    window=query.get("window", [None])[0],
+                )
+            except ValueError as exc:
+                self._send_json(json.dumps({"error": str(exc)}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json(body, etag=etag)
+            return
+
+        if parsed.path == "/api/transactions":
+            user = _get_user(self)
+            if not user:
+                self._send_json(json.dumps({"error": "unauthorized"}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.UNAUTHORIZED)
+                return
+
+            query = parse_qs(parsed.query)
+            user_id, _ = user
+            etag = _view_etag(user_id, parsed)
+            if self._not_modified(etag):
+                return
+            try:
+                body = render_transactions_payload(
+                    user_id=user_id,
+                    period=query.get("period", [None])[0],
+                    limit=_page_size(query.get("limit", [None])[0]),
+                    cursor=query.get("cursor", [None])[0],
+                )
+            except ValueError as exc:
+                self._send_json(json.dumps({"error": str(exc)}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.BAD_REQUEST)
+                return
+            self._send_json(body, etag=etag)
             return
 
         if parsed.path == "/":
@@ -458,27 +1024,53 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             period = query.get("period", [None])[0]
             user = _get_user(self)
             if not user:
-                self._send_html(render_auth_page())
+                self._send_html(render_auth_chunks())
                 return
             user_id, user_name = user
-            self._send_html(render_dashboard(user_name=user_name, user_id=user_id, period=period))
+            etag = _view_etag(user_id, parsed)
+            if self._not_modified(etag):
+                return
+            cursor = query.get("cursor", [None])[0]
+            self._send_html(
+                render_dashboard_chunks(user_name=user_name, user_id=user_id, period=period, cursor=cursor), etag=etag
+            )
             return
 
-        if parsed.path == "/static/styles.css":
-            from pathlib import Path
-
-            css_path = Path(__file__).resolve().parent / "static" / "styles.css"
-            with css_path.open("rb") as file:
-                css = file.read()
-            self.send_response(HTTPStatus.OK)
-            self.send_header("Content-Type", "text/css; charset=utf-8")
+        asset = STATIC_ASSETS.get(parsed.path)
+        if asset is not None:
+            encoding = compressor.negotiate(self.headers.get("Accept-Encoding"), len(asset.body), asset.content_type)
+            # Each encoding is a different representation and needs its own strong ETag.
+            etag = asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+            if_none_match = self.headers.get("If-None-Match")
+            # If-Modified-Since only counts when the client sent no ETag (RFC 9110, 13.2.2).
+            fresh = etag_matches(if_none_match, etag) or (
+                if_none_match is None and not_modified_since(self.headers.get("If-Modified-Since"), asset.last_modified)
+            )
+            self.send_response(HTTPStatus.NOT_MODIFIED if fresh else HTTPStatus.OK)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", asset.last_modified_header)
+            self.send_header("Cache-Control", STATIC_CACHE_CONTROL)
+            self.send_header("Vary", "Accept-Encoding")
+            if fresh:
+                self.end_headers()
+                return
+            body = asset.body if encoding is None else compressor.compress_static(parsed.path, asset.body, encoding)
+            self.send_header("Content-Type", asset.content_type)
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
             self.end_headers()
-            self.wfile.write(css)
+            self.wfile.write(body)
             return
 
         self.send_error(HTTPStatus.NOT_FOUND)
 
-    def do_POST(self) -> None:  # noqa: N802
+    def _route_post(self, parsed: ParseResult) -> None:
+        if parsed.path == "/api/import":
+            # Statements can be large: stream the body instead of reading it into form data.
+            self._handle_import(parse_qs(parsed.query))
+            return
+
         content_length = int(self.headers.get("Content-Length", "0"))
         data = self.rfile.read(content_length).decode("utf-8")
         form_data = parse_qs(data)
@@ -495,8 +1087,7 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             user_id = int(payload)
             user = repository.get_user(user_id)
             user_name = user[1] if user else name.strip()
-            token = secrets.token_urlsafe(32)
-            sessions[token] = user_id
+            token = sessions.create(user_id, user_name)
             self.send_response(HTTPStatus.CREATED)
             _set_session_cookie(self, token)
             body = render_auth_result_payload(True, "Conta criada com sucesso.", user_id=user_id, user_name=user_name)
@@ -515,8 +1106,7 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
                 return
 
             user_id, user_name = payload
-            token = secrets.token_urlsafe(32)
-            sessions[token] = user_id
+            token = sessions.create(user_id, user_name)
             self.send_response(HTTPStatus.OK)
             _set_session_cookie(self, token)
             body = render_auth_result_payload(True, "Login realizado com sucesso.", user_id=user_id, user_name=user_name)
@@ -532,14 +1122,14 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             password = form_data.get("password", [""])[0]
             ok, payload = repository.create_user(name, email, password)
             if not ok:
-                self._send_html(render_auth_page(str(payload)), status=HTTPStatus.BAD_REQUEST)
+                self._send_html(render_auth_chunks(str(payload)), status=HTTPStatus.BAD_REQUEST)
                 return
 
-            token = secrets.token_urlsafe(32)
-            sessions[token] = int(payload)
+            token = sessions.create(int(payload), name.strip())
             self.send_response(HTTPStatus.SEE_OTHER)
             _set_session_cookie(self, token)
             self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
             self.end_headers()
             return
 
@@ -548,25 +1138,26 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             password = form_data.get("password", [""])[0]
             ok, payload = repository.authenticate_user(email, password)
             if not ok:
-                self._send_html(render_auth_page(str(payload)), status=HTTPStatus.UNAUTHORIZED)
+                self._send_html(render_auth_chunks(str(payload)), status=HTTPStatus.UNAUTHORIZED)
                 return
 
-            user_id, _ = payload
-            token = secrets.token_urlsafe(32)
-            sessions[token] = user_id
+            user_id, user_name = payload
+            token = sessions.create(user_id, user_name)
             self.send_response(HTTPStatus.SEE_OTHER)
             _set_session_cookie(self, token)
             self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
             self.end_headers()
             return
 
         if self.path == "/logout":
             token = _get_session_token(self)
             if token:
-                sessions.pop(token, None)
+                sessions.delete(token)
             self.send_response(HTTPStatus.SEE_OTHER)
             _clear_session_cookie(self)
             self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
             self.end_headers()
             return
 
@@ -590,6 +1181,7 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             if not user:
                 self.send_response(HTTPStatus.SEE_OTHER)
                 self.send_header("Location", "/")
+                self.send_header("Content-Length", "0")
                 self.end_headers()
                 return
 
@@ -597,42 +1189,215 @@ class SmartBudgetHandler(BaseHTTPRequestHandler):
             error = save_transaction(user_id, form_data)
             if error:
                 self._send_html(
-                    render_dashboard(user_name=user_name, user_id=user_id, error=error), status=HTTPStatus.BAD_REQUEST
+                    render_dashboard_chunks(user_name=user_name, user_id=user_id, error=error), status=HTTPStatus.BAD_REQUEST
                 )
                 return
 
             self.send_response(HTTPStatus.SEE_OTHER)
             self.send_header("Location", "/")
+            self.send_header("Content-Length", "0")
             self.end_headers()
             return
 
         self.send_error(HTTPStatus.NOT_FOUND)
 
+    def _handle_import(self, query: dict[str, list[str]]) -> None:
+        content_length = int(self.headers.get("Content-Length", "0"))
+        body = _RequestBody(self.rfile, content_length)  # type: ignore[arg-type]
+        user = _get_user(self)
+        if not user:
+            body.read()
+            self._send_json(json.dumps({"error": "unauthorized"}, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.UNAUTHORIZED)
+            return
+
+        fmt = _import_format(query, self.headers.get("Content-Type"))
+        if fmt not in SUPPORTED_FORMATS:
+            body.read()
+            self._send_json(
+                json.dumps({"ok": False, "error": "Formato não suportado. Use csv ou ofx."}, ensure_ascii=False).encode("utf-8"),
+                status=HTTPStatus.BAD_REQUEST,
+            )
+            return
+
+        user_id, _ = user
+        lines = io.TextIOWrapper(io.BufferedReader(body), encoding="utf-8-sig", errors="replace", newline="")
+        try:
+            result = import_statement(repository, user_id, lines, fmt, categorize=batch_categorizer.categorize)
+        except ImportInterrupted as exc:
+            body.read()
+            error = str(exc)
+            if exc.result.imported:
+                error += f" As {exc.result.imported} transações anteriores foram importadas."
+            payload = {"ok": False, "error": error, "imported": exc.result.imported, "skipped": exc.result.skipped}
+            self._send_json(json.dumps(payload, ensure_ascii=False).encode("utf-8"), status=HTTPStatus.BAD_REQUEST)
+            return
+        finally:
+            # Imported rows may span any period; reload the ledger on next access.
+            ledger_cache.invalidate(user_id)
+            render_cache.invalidate_user(user_id)
+
+        self._send_json(
+            json.dumps({"ok": True, "imported": result.imported, "skipped": result.skipped}, ensure_ascii=False).encode("utf-8"),
+            status=HTTPStatus.CREATED,
+        )
+
     def log_message(self, format: str, *args: object) -> None:
         return
 
 
-    def _send_json(self, body: bytes, status: HTTPStatus = HTTPStatus.OK) -> None:
+    def _not_modified(self, etag: str) -> bool:
+        """Answer 304 when the client already holds `etag`; the caller then stops."""
+
+        if not etag_matches(self.headers.get("If-None-Match"), etag):
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", PRIVATE_CACHE_CONTROL)
+        self.end_headers()
+        return True
+
+    def _send_validators(self, etag: str | None) -> None:
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", PRIVATE_CACHE_CONTROL)
+
+    def _send_body(self, body: bytes, content_type: str, status: HTTPStatus, etag: str | None) -> None:
+        encoding = compressor.negotiate(self.headers.get("Accept-Encoding"), len(body), content_type)
+        if encoding is not None:
+            body = compressor.compress(body, encoding)
         self.send_response(status)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
         self.send_header("Content-Length", str(len(body)))
+        self._send_validators(etag)
         self.end_headers()
         self.wfile.write(body)
 
-    def _send_html(self, body: str, status: HTTPStatus = HTTPStatus.OK) -> None:
-        encoded = body.encode("utf-8")
-        self.send_response(status)
-        self.send_header("Content-Type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(encoded)))
+    def _stream_json(self, pieces: Iterable[bytes], etag: str | None = None) -> None:
+        """Send a body of unknown length as it is produced.
+
+        HTTP/1.1 connections get chunked transfer coding and stay open; on
+        HTTP/1.0 the body simply ends when the connection is closed.
+        """
+
+        encoding = compressor.negotiate(
+            self.headers.get("Accept-Encoding"), compressor.min_size, "application/json", encodings=("gzip",)
+        )
+        chunked = self.protocol_version == "HTTP/1.1" and self.request_version == "HTTP/1.1"
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self._send_validators(etag)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
         self.end_headers()
-        self.wfile.write(encoded)
+
+        deflate = compressor.compressobj() if encoding is not None else None
+        for piece in pieces:
+            if deflate is not None:
+                piece = deflate.compress(piece)
+            self._write_piece(piece, chunked)
+        if deflate is not None:
+            self._write_piece(deflate.flush(), chunked)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _write_piece(self, piece: bytes, chunked: bool) -> None:
+        if not piece:
+            # An empty chunk would end a chunked body early.
+            return
+        self.wfile.write(b"%X\r\n%s\r\n" % (len(piece), piece) if chunked else piece)
+
+    def _send_json(self, body: bytes, status: HTTPStatus = HTTPStatus.OK, etag: str | None = None) -> None:
+        self._send_body(body, "application/json; charset=utf-8", status, etag)
+
+    def _send_html(self, body: str | Chunks, status: HTTPStatus = HTTPStatus.OK, etag: str | None = None) -> None:
+        # Template chunks are joined into one buffer: the socket writer is
+        # unbuffered, so writing them one by one would cost a send() each.
+        encoded = body.encode("utf-8") if isinstance(body, str) else b"".join(body)
+        self._send_body(encoded, "text/html; charset=utf-8", status, etag)
+
+
+def prepare_worker(index: int) -> None:
+    """Reset per-process state before a server process starts answering requests."""
+
+    ledger_cache.clear()
+    render_cache.clear()
+    if sampler is not None:
+        sampler.start()
+    # Only one worker resumes categorizations left pending by a previous run.
+    if index == 0 and batch_categorizer.provider is not None:
+        categorization_queue.resume_pending()
+
+
+def finish_worker(index: int) -> None:
+    """Flush per-process reports before a server process exits."""
+
+    if sampler is not None:
+        sampler.stop()
 
 
-def run(host: str = "0.0.0.0", port: int = 8000) -> None:
+def run(host: str = "0.0.0.0", port: int = 8000, workers: int = 1) -> None:
+    """Serve the app; with `workers > 1` pre-fork that many processes (SIGHUP restarts them gracefully)."""
+
+    global sessions
+
     server = ThreadingHTTPServer((host, port), SmartBudgetHandler)
     print(f"IA Finance rodando em http://{host}:{port}")
-    server.serve_forever()
+    if workers <= 1:
+        prepare_worker(0)
+        try:
+            server.serve_forever()
+        finally:
+            finish_worker(0)
+        return
+
+    # Processes share nothing but the database: keep sessions there and check
+    # each cached ledger against the stored data version before using it.
+    if isinstance(sessions, MemorySessionStore):
+        sessions = SQLiteSessionStore(repository)
+    ledger_cache.validate = True
+    serve_prefork(server, workers, on_worker_start=prepare_worker, on_worker_exit=finish_worker)
+
+
+def configure_profiling(environ: Mapping[str, str]) -> None:
+    """Enable profiling from `SMARTBUDGET_PROFILE_*` variables.
+
+    `SMARTBUDGET_PROFILE_DIR` is where reports go; `SMARTBUDGET_PROFILE_ADMINS`
+    lists the user ids (comma separated) allowed to profile their requests;
+    `SMARTBUDGET_PROFILE_SAMPLE` is a sampling interval in seconds that turns
+    the stack sampler on.
+    """
+
+    global sampler
+
+    output_dir = environ.get("SMARTBUDGET_PROFILE_DIR")
+    if not output_dir:
+        return
+    profiler.output_dir = Path(output_dir)
+    admins = environ.get("SMARTBUDGET_PROFILE_ADMINS", "")
+    profiler.admins = frozenset(int(item) for item in admins.split(",") if item.strip())
+    interval = environ.get("SMARTBUDGET_PROFILE_SAMPLE")
+    if interval:
+        sampler = StackSampler(output_dir, interval=float(interval))
+
+
+def configure_metrics(environ: Mapping[str, str]) -> None:
+    """Enable /api/metrics for scrapers sending `Authorization: Bearer $SMARTBUDGET_METRICS_TOKEN`."""
+
+    global metrics_token
+
+    metrics_token = environ.get("SMARTBUDGET_METRICS_TOKEN") or None
 
 
 if __name__ == "__main__":
-    run()
+    configure_metrics(os.environ)
+    configure_profiling(os.environ)
+    run(workers=int(os.environ.get("SMARTBUDGET_WORKERS", "1")))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from smartbudget.ledger import Ledger
+from smartbudget.models import Transaction
+
+TransactionLoader = Callable[[int], Iterable[Transaction]]
+VersionLoader = Callable[[int], int]
+LedgerFactory = Callable[[], Ledger]
+
+
+@dataclass(slots=True)
+class _Entry:
+    ledger: Ledger
+    loaded_at: float
+    version: int
+
+
+class LedgerCache:
+    """Keep one `Ledger` per user in memory.
+
+    Entries are evicted least-recently-used once `max_users` is exceeded and
+    reloaded from `loader` when older than `ttl` seconds, so the cache stays
+    bounded and eventually picks up writes made outside this process.
+
+    Each entry remembers the user's data version (from `version_loader`, read
+    when the ledger is loaded and bumped by `mark_written`). With `validate`
+    enabled every `get` compares it with the stored version first, which
+    keeps several server processes coherent at the cost of one indexed lookup.
+
+    `ledger_factory` builds the empty ledger each user is loaded into, e.g.
+    `ColumnarLedger` to hold long histories in a fraction of the memory.
+    """
+
+    def __init__(
+        self,
+        loader: TransactionLoader,
+        max_users: int = 256,
+        ttl: float = 300.0,
+        version_loader: VersionLoader | None = None,
+        validate: bool = False,
+        ledger_factory: LedgerFactory = Ledger,
+    ) -> None:
+        self._loader = loader
+        self._version_loader = version_loader
+        self._ledger_factory = ledger_factory
+        self.max_users = max_users
+        self.ttl = ttl
+        self.validate = validate
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: object) -> bool:
+        return isinstance(user_id, int) and self._fresh(user_id, time.monotonic()) is not None
+
+    def get(self, user_id: int) -> Ledger:
+        now = time.monotonic()
+        current_version = self._version_loader(user_id) if self.validate and self._version_loader else None
+        with self._lock:
+            entry = self._fresh(user_id, now)
+            if entry is not None and current_version in (None, entry.version):
+                self._entries.move_to_end(user_id)
+                return entry.ledger
+
+        # Load outside the lock so a cold user never blocks warm ones. The
+        # version is read first: a write racing the load only makes it stale.
+        version = current_version if current_version is not None else self._load_version(user_id)
+        loaded = self._ledger_factory()
+        loaded.record_transactions(self._loader(user_id))
+
+        with self._lock:
+            entry = self._fresh(user_id, time.monotonic())
+            if entry is not None and entry.version >= version:
+                # Another thread stored (and possibly appended to) this user meanwhile.
+                self._entries.move_to_end(user_id)
+                return entry.ledger
+            self._entries[user_id] = _Entry(loaded, now, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return loaded
+
+    def peek(self, user_id: int) -> Ledger | None:
+        """Return the cached ledger without loading or refreshing it."""
+
+        with self._lock:
+            entry = self._fresh(user_id, time.monotonic())
+            return entry.ledger if entry else None
+
+    def version(self, user_id: int) -> int | None:
+        """Data version of the cached ledger, or `None` when the user is not cached."""
+
+        with self._lock:
+            entry = self._fresh(user_id, time.monotonic())
+            return entry.version if entry else None
+
+    def mark_written(self, user_id: int) -> None:
+        """Record that this process just stored and applied one change for the user."""
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.version += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _load_version(self, user_id: int) -> int:
+        return self._version_loader(user_id) if self._version_loader else 0
+
+    def _fresh(self, user_id: int, now: float) -> _Entry | None:
+        entry = self._entries.get(user_id)
+        if entry is None or now - entry.loaded_at >= self.ttl:
+            return None
+        return entry
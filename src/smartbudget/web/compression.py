@@ -0,0 +1,99 @@
+"""Response compression negotiated from `Accept-Encoding`.
+
+gzip is always available; brotli is used when the optional `brotli`
+package is installed and the client prefers it or accepts it equally.
+Bodies below `min_size` are sent as they are: the framing overhead and the
+CPU time are not worth it for small JSON answers.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json")
+
+
+def _accepted(accept_encoding: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    return weights
+
+
+class Compressor:
+    def __init__(self, level: int = 6, min_size: int = 1024, brotli_quality: int = 5) -> None:
+        # Levels trade CPU for bandwidth: 1 is fastest, 9 smallest.
+        self.level = level
+        self.min_size = min_size
+        self.brotli_quality = brotli_quality
+        self._static: dict[tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def encodings(self) -> tuple[str, ...]:
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(
+        self,
+        accept_encoding: str | None,
+        size: int,
+        content_type: str = "text/html",
+        encodings: tuple[str, ...] | None = None,
+    ) -> str | None:
+        """Encoding to use for a body of `size` bytes, or `None` to send it uncompressed.
+
+        `encodings` narrows the candidates, e.g. to `("gzip",)` for streamed bodies.
+        """
+
+        if not accept_encoding or size < self.min_size or self.level <= 0:
+            return None
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        weights = _accepted(accept_encoding)
+        wildcard = weights.get("*", 0.0)
+        best, best_weight = None, 0.0
+        for encoding in encodings or self.encodings:
+            weight = weights.get(encoding, wildcard)
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    def compress(self, body: bytes, encoding: str, level: int | None = None) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality if level is None else level)
+        # mtime=0 keeps the output deterministic for identical bodies.
+        return gzip.compress(body, compresslevel=self.level if level is None else level, mtime=0)
+
+    def compressobj(self) -> zlib._Compress:
+        """Incremental gzip compressor for bodies written in pieces."""
+
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress_static(self, key: str, body: bytes, encoding: str) -> bytes:
+        """Compress an immutable body once per encoding, at the best ratio, and reuse it."""
+
+        with self._lock:
+            cached = self._static.get((key, encoding))
+        if cached is None:
+            cached = self.compress(body, encoding, level=11 if encoding == "br" else 9)
+            with self._lock:
+                self._static[(key, encoding)] = cached
+        return cached
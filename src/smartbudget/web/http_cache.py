@@ -0,0 +1,79 @@
+"""Validators for conditional GET requests.
+
+Static assets are read once, at import, and served from memory with a
+strong content ETag. Dashboard responses get a weak ETag built from the
+user's data version, so a revalidation is answered with 304 before anything
+is rendered.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+# Browsers may keep dashboard responses but must revalidate them on every use.
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True, slots=True)
+class StaticAsset:
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: datetime
+
+    @property
+    def last_modified_header(self) -> str:
+        return format_datetime(self.last_modified, usegmt=True)
+
+
+def load_static(name: str, content_type: str) -> StaticAsset:
+    path = STATIC_DIR / name
+    body = path.read_bytes()
+    # HTTP dates have one-second resolution; drop the fraction so comparisons work.
+    modified = datetime.fromtimestamp(int(path.stat().st_mtime), tz=timezone.utc)
+    return StaticAsset(
+        body=body,
+        content_type=content_type,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        last_modified=modified,
+    )
+
+
+def dashboard_etag(user_id: int, data_version: int, resource: str, today: str) -> str:
+    """Weak ETag for a rendered view of one user's data.
+
+    `resource` is the path and query string; `today` is included because the
+    default period and the date field of the form depend on it.
+    """
+
+    key = f"{user_id}|{data_version}|{resource}|{today}".encode("utf-8")
+    return f'W/"{hashlib.blake2b(key, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of `etag` against an `If-None-Match` header."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified_since(if_modified_since: str | None, last_modified: datetime) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import signal
+import socketserver
+import threading
+import time
+from collections.abc import Callable
+
+WorkerHook = Callable[[int], None]
+
+
+def serve_prefork(
+    server: socketserver.TCPServer,
+    workers: int,
+    on_worker_start: WorkerHook | None = None,
+    on_worker_exit: WorkerHook | None = None,
+    poll_interval: float = 0.2,
+    shutdown_timeout: float = 30.0,
+) -> None:
+    """Serve `server` from `workers` forked processes sharing its listening socket.
+
+    The calling process only supervises: it replaces workers that die, and on
+    SIGHUP performs a graceful restart (a new generation of workers starts
+    accepting before the old one is asked to finish its in-flight requests and
+    exit). SIGTERM or SIGINT stop every worker gracefully and return.
+    `on_worker_start(index)` runs inside each new worker before it serves and
+    `on_worker_exit(index)` after it stopped, right before the process exits.
+    """
+
+    children: dict[int, tuple[int, int]] = {}  # pid -> (generation, worker index)
+    generation = 0
+    flags = {"restart": False, "stop": False}
+
+    def spawn(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(server, index, on_worker_start, on_worker_exit)
+        children[pid] = (generation, index)
+
+    def request_restart(signum: int, frame: object) -> None:
+        flags["restart"] = True
+
+    def request_stop(signum: int, frame: object) -> None:
+        flags["stop"] = True
+
+    previous = {
+        signum: signal.signal(signum, handler)
+        for signum, handler in (
+            (signal.SIGHUP, request_restart),
+            (signal.SIGTERM, request_stop),
+            (signal.SIGINT, request_stop),
+        )
+    }
+    try:
+        for index in range(workers):
+            spawn(index)
+
+        while not flags["stop"]:
+            if flags["restart"]:
+                flags["restart"] = False
+                retiring = list(children)
+                generation += 1
+                for index in range(workers):
+                    spawn(index)
+                _signal_all(retiring, signal.SIGTERM)
+
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(poll_interval)
+                continue
+            born_in, index = children.pop(pid, (None, None))
+            if born_in == generation and index is not None and not flags["stop"]:
+                spawn(index)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+        _signal_all(list(children), signal.SIGTERM)
+        _reap(children, shutdown_timeout)
+
+
+def _run_worker(
+    server: socketserver.TCPServer,
+    index: int,
+    on_worker_start: WorkerHook | None,
+    on_worker_exit: WorkerHook | None,
+) -> None:
+    status = 0
+    try:
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+
+        def stop(signum: int, frame: object) -> None:
+            # shutdown() blocks until serve_forever returns, so call it off the main thread.
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        # Track request threads so server_close() waits for in-flight requests.
+        server.daemon_threads = False  # type: ignore[attr-defined]
+        if on_worker_start:
+            on_worker_start(index)
+        server.serve_forever()
+        server.server_close()
+        if on_worker_exit:
+            on_worker_exit(index)
+    except BaseException:
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def _signal_all(pids: list[int], signum: int) -> None:
+    for pid in pids:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def _reap(children: dict[int, tuple[int, int]], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while children and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            time.sleep(0.05)
+        else:
+            children.pop(pid, None)
+    _signal_all(list(children), signal.SIGKILL)
+    for pid in list(children):
+        os.waitpid(pid, 0)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+Period = tuple[int, int]
+# A whole response body, or the encoded fragments of a page assembled per request.
+Rendered = bytes | tuple[bytes, ...]
+_Key = tuple[int, Period, str]
+
+
+def _size(body: Rendered) -> int:
+    return len(body) if isinstance(body, bytes) else sum(map(len, body))
+
+
+@dataclass(slots=True)
+class _Rendered:
+    version: int
+    body: Rendered
+    size: int
+
+
+class RenderCache:
+    """LRU cache of rendered dashboard views keyed by (user, period, variant).
+
+    `variant` tells apart the views of one period (HTML page, JSON payload,
+    a given page of rows...). Every entry remembers the user's data version
+    it was rendered from and only answers lookups made at that version, so
+    writes from other processes can never be served stale.
+
+    Writes from this process call `invalidate_period`: it drops the views of
+    the written period and carries the user's other views forward to the
+    new version, so they keep hitting. The cache is bounded by the total
+    size of the stored bodies.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: OrderedDict[_Key, _Rendered] = OrderedDict()
+        self._by_user: dict[int, set[_Key]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, period: Period, variant: str, version: int) -> Rendered | None:
+        key = (user_id, period, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def put(self, user_id: int, period: Period, variant: str, version: int, body: Rendered) -> None:
+        size = _size(body)
+        # One huge view would evict everything else; leave it uncached.
+        if size > self.max_bytes // 4:
+            return
+        key = (user_id, period, variant)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = _Rendered(version, body, size)
+            self._by_user.setdefault(user_id, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate_period(self, user_id: int, period: Period, version: int) -> None:
+        """Forget `period` after a write that moved the user to data `version`."""
+
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                if key[1] == period:
+                    self._discard(key)
+                    continue
+                entry = self._entries[key]
+                if entry.version == version - 1:
+                    entry.version = version
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _discard(self, key: _Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        keys = self._by_user[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_user[key[0]]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from smartbudget.repositories import TransactionRepository
+
+SessionUser = tuple[int, str]
+
+DEFAULT_TTL = 30 * 24 * 3600.0
+
+
+class SessionStore(Protocol):
+    """Maps session tokens to `(user_id, user_name)` until they expire."""
+
+    ttl: float
+
+    def create(self, user_id: int, user_name: str) -> str: ...
+
+    def get(self, token: str) -> SessionUser | None: ...
+
+    def delete(self, token: str) -> None: ...
+
+
+class MemorySessionStore:
+    """Process-local sessions with a TTL and an LRU bound on their number."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = 100_000) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[int, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def create(self, user_id: int, user_name: str) -> str:
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self._lock:
+            self._entries[token] = (user_id, user_name, now + self.ttl)
+            self._sweep(now)
+        return token
+
+    def get(self, token: str) -> SessionUser | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user_id, user_name, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+        return user_id, user_name
+
+    def delete(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def _sweep(self, now: float) -> None:
+        # Least recently used first: expired or over-capacity entries sit at the front.
+        while self._entries:
+            token, (_, _, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[token]
+
+
+class SQLiteSessionStore:
+    """Sessions kept in the repository database, shared by every server process."""
+
+    def __init__(
+        self, repository: TransactionRepository, ttl: float = DEFAULT_TTL, sweep_interval: float = 300.0
+    ) -> None:
+        self.repository = repository
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def create(self, user_id: int, user_name: str) -> str:
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        self.repository.create_session(token, user_id, user_name, now + self.ttl)
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.repository.purge_expired_sessions(now)
+        return token
+
+    def get(self, token: str) -> SessionUser | None:
+        return self.repository.get_session(token, time.time())
+
+    def delete(self, token: str) -> None:
+        self.repository.delete_session(token)
@@ -0,0 +1,54 @@
+"""Precompiled HTML templates.
+
+A `Template` is split once, when it is created, into UTF-8 encoded static
+fragments and `$name` slots (the `string.Template` syntax, `$$` for a literal
+dollar sign). Rendering only encodes the slot values and returns the page as
+a list of byte chunks, so the static markup is never copied or re-encoded.
+"""
+
+from __future__ import annotations
+
+import string
+from collections.abc import Mapping
+
+Chunks = list[bytes]
+
+
+class Template:
+    def __init__(self, source: str) -> None:
+        statics: list[bytes] = []
+        slots: list[str] = []
+        pending: list[str] = []
+        position = 0
+        for match in string.Template.pattern.finditer(source):
+            pending.append(source[position : match.start()])
+            position = match.end()
+            if match.group("escaped") is not None:
+                pending.append("$")
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                line = source.count("\n", 0, match.start()) + 1
+                raise ValueError(f"Invalid placeholder on template line {line}")
+            statics.append("".join(pending).encode("utf-8"))
+            slots.append(name)
+            pending = []
+        pending.append(source[position:])
+        statics.append("".join(pending).encode("utf-8"))
+
+        self.slots = tuple(slots)
+        self._statics = tuple(statics)
+
+    def render_chunks(self, values: Mapping[str, str | bytes]) -> Chunks:
+        """Return the page as byte chunks; values must already be HTML-escaped."""
+
+        statics = self._statics
+        chunks = [statics[0]]
+        for name, static in zip(self.slots, statics[1:]):
+            value = values[name]
+            chunks.append(value if isinstance(value, bytes) else value.encode("utf-8"))
+            chunks.append(static)
+        return chunks
+
+    def render(self, values: Mapping[str, str | bytes]) -> str:
+        return b"".join(self.render_chunks(values)).decode("utf-8")
@@ -0,0 +1,139 @@
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+from smartbudget.ai import BatchCategorizer, CategoryCache, batched
+from smartbudget.categorization_queue import CategorizationQueue
+from smartbudget.models import CategoryStatus, Transaction, TransactionType
+from smartbudget.repositories import TransactionRepository
+
+
+def test_batch_categorizer_sends_unique_descriptions_in_batches():
+    calls: list[list[str]] = []
+
+    def provider(descriptions: list[str]) -> list[str]:
+        calls.append(descriptions)
+        return [f"IA:{description}" for description in descriptions]
+
+    categorizer = BatchCategorizer(provider, batch_size=2)
+    result = categorizer.categorize(["a", "b", "a", "c"])
+
+    assert result == ["IA:a", "IA:b", "IA:a", "IA:c"]
+    assert sorted(calls) == [["a", "b"], ["c"]]
+    categorizer.close()
+
+
+def test_batch_categorizer_limits_concurrency_and_falls_back_on_timeout():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_provider(descriptions: list[str]) -> list[str]:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.5 if "uber" in descriptions else 0.02)
+        with lock:
+            in_flight -= 1
+        return ["Modelo"] * len(descriptions)
+
+    categorizer = BatchCategorizer(slow_provider, batch_size=1, max_workers=2, timeout=0.2)
+    started = time.monotonic()
+    result = categorizer.categorize(["netflix", "uber", "spotify", "mercado"])
+
+    assert time.monotonic() - started < 0.5
+    assert result == ["Modelo", "Transporte", "Modelo", "Modelo"]
+    assert peak <= 2
+    categorizer.close()
+
+
+def test_batch_categorizer_does_not_wait_on_a_pool_of_hung_calls():
+    release = threading.Event()
+
+    def provider(descriptions: list[str]) -> list[str]:
+        if "hang" in descriptions[0]:
+            release.wait(timeout=5)
+        return ["Modelo"] * len(descriptions)
+
+    categorizer = BatchCategorizer(provider, batch_size=1, max_workers=2, timeout=0.1)
+    assert categorizer.resolve(["hang 1", "hang 2"]) == [("Outros", False), ("Outros", False)]
+    assert categorizer.in_flight == 2
+
+    started = time.monotonic()
+    assert categorizer.resolve(["Netflix"]) == [("Lazer", False)]
+    assert time.monotonic() - started < 0.05
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while categorizer.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert categorizer.resolve(["Netflix"]) == [("Modelo", True)]
+    categorizer.close()
+
+
+def test_batch_categorizer_sends_each_normalized_description_once():
+    calls: list[list[str]] = []
+
+    def provider(descriptions: list[str]) -> list[str]:
+        calls.append(descriptions)
+        return ["Lazer"] * len(descriptions)
+
+    categorizer = BatchCategorizer(provider)
+    assert categorizer.categorize(["Cinema", "  CINEMA ", "cinema"]) == ["Lazer"] * 3
+    assert calls == [["Cinema"]]
+    categorizer.close()
+
+
+def test_batch_categorizer_uses_cache_before_provider():
+    calls: list[str] = []
+
+    def provider(description: str) -> str:
+        calls.append(description)
+        return "Lazer"
+
+    categorizer = BatchCategorizer(batched(provider), cache=CategoryCache())
+    categorizer.categorize(["Cinema"])
+    categorizer.categorize(["cinema ", "CINEMA"])
+
+    assert calls == ["Cinema"]
+    categorizer.close()
+
+
+def test_batch_categorizer_does_not_cache_keyword_fallbacks():
+    cache = CategoryCache()
+    categorizer = BatchCategorizer(cache=cache)
+
+    assert categorizer.resolve(["Cinema"]) == [("Lazer", False)]
+    assert len(cache) == 0 and cache.stats()["misses"] == 0
+
+
+def test_failed_refinement_stays_pending_and_is_resumed(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    _, created = repo.create_user("Ana", "ana@example.com", "1234")
+    user_id = int(created)
+    txn = Transaction(Decimal("39.90"), "Netflix", date(2026, 6, 1), "Lazer", TransactionType.EXPENSE)
+    txn.category_status = CategoryStatus.PENDING
+    repo.insert_transaction(user_id, txn)
+
+    def failing_provider(descriptions: list[str]) -> list[str]:
+        raise TimeoutError("provider unavailable")
+
+    updates: list[str] = []
+    categorizer = BatchCategorizer(failing_provider)
+    queue = CategorizationQueue(categorizer, repo, on_update=lambda user, txn, category: updates.append(category))
+    queue.submit(user_id, txn)
+    queue.join()
+
+    assert updates == []
+    assert repo.list_pending_categorizations() == [(user_id, txn)]
+
+    categorizer.provider = lambda descriptions: ["Streaming"] * len(descriptions)
+    assert queue.resume_pending() == 1
+    queue.join()
+
+    assert updates == ["Streaming"]
+    assert repo.list_pending_categorizations() == []
+    assert repo.list_transactions(user_id)[0].category == "Streaming"
+    categorizer.close()
@@ -0,0 +1,238 @@
+import asyncio
+import http.client
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from smartbudget.web.aio import AsyncServer
+from smartbudget.web.app import repository
+
+
+@pytest.fixture
+def async_server():
+    started = threading.Event()
+    holder: dict[str, object] = {}
+
+    async def main() -> None:
+        server = await AsyncServer(max_workers=2).start("127.0.0.1", 0)
+        holder["loop"] = asyncio.get_running_loop()
+        holder["server"] = server
+        holder["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        async with server:
+            try:
+                await server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    # asyncio.run() cancels the connections still open when the server stops.
+    thread = threading.Thread(target=lambda: asyncio.run(main()), daemon=True)
+    thread.start()
+    started.wait(timeout=5)
+    yield holder["port"]
+    holder["loop"].call_soon_threadsafe(holder["server"].close)  # type: ignore[attr-defined]
+    thread.join(timeout=5)
+
+
+def setup_function() -> None:
+    repository.clear_transactions()
+    repository.clear_users()
+
+
+def test_keep_alive_connection_serves_several_requests(async_server):
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=5)
+
+    conn.request("GET", "/api/health")
+    first = conn.getresponse()
+    assert json.loads(first.read()) == {"status": "ok", "service": "ia-finance"}
+    sock = conn.sock
+
+    conn.request(
+        "POST",
+        "/register",
+        body="name=Ana&email=ana@aio.com&password=1234",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    redirect = conn.getresponse()
+    redirect.read()
+    assert redirect.status == 303
+    cookie = redirect.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+
+    conn.request("GET", "/api/session", headers={"Cookie": cookie})
+    session = json.loads(conn.getresponse().read())
+    assert session["user"]["name"] == "Ana"
+
+    # Every response was framed, so all of them reused one socket.
+    assert conn.sock is sock
+
+    conn.request("GET", "/nao-existe")
+    assert conn.getresponse().status == 404
+    conn.close()
+
+
+def test_streamed_dashboard_uses_chunked_encoding(async_server, monkeypatch):
+    monkeypatch.setattr("smartbudget.web.app.STREAM_THRESHOLD", 0)
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=5)
+    conn.request(
+        "POST",
+        "/api/register",
+        body="name=Bia&email=bia@aio.com&password=1234",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    registered = conn.getresponse()
+    registered.read()
+    cookie = registered.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+    conn.request(
+        "POST",
+        "/api/transactions",
+        body="transaction_type=expense&amount=12&description=Mercado&txn_date=2026-12-01",
+        headers={"Content-Type": "application/x-www-form-urlencoded", "Cookie": cookie},
+    )
+    conn.getresponse().read()
+    sock = conn.sock
+
+    conn.request("GET", "/api/dashboard?period=2026-12", headers={"Cookie": cookie})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert payload["transactions"][0]["description"] == "Mercado"
+    assert conn.sock is sock
+    conn.close()
+
+
+def test_streamed_response_reaches_the_client_while_it_is_produced(async_server, monkeypatch):
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=5)
+    conn.request(
+        "POST",
+        "/api/register",
+        body="name=Dani&email=dani@aio.com&password=1234",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    registered = conn.getresponse()
+    registered.read()
+    cookie = registered.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+
+    release = threading.Event()
+
+    def pieces(user_id: int, period: str | None) -> object:
+        def produce():
+            yield b'{"first": true'
+            release.wait(timeout=5)
+            yield b', "last": true}'
+
+        return produce()
+
+    monkeypatch.setattr("smartbudget.web.aio.RESPONSE_FLUSH_BYTES", 1)
+    monkeypatch.setattr("smartbudget.web.app.stream_dashboard_payload", pieces)
+    conn.request("GET", "/api/dashboard", headers={"Cookie": cookie})
+    response = conn.getresponse()
+
+    assert response.read1() == b'{"first": true'
+    release.set()
+    assert json.loads(b'{"first": true' + response.read()) == {"first": True, "last": True}
+    conn.close()
+
+
+def _exchange(port: int, request: bytes) -> bytes:
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(request)
+        received = b""
+        while chunk := sock.recv(65536):
+            received += chunk
+    return received
+
+
+def test_requests_with_untrusted_framing_are_refused(async_server):
+    chunked = _exchange(
+        async_server,
+        b"POST /api/login HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5\r\nemail\r\n0\r\n\r\nGET /api/health HTTP/1.1\r\nHost: x\r\n\r\n",
+    )
+    negative = _exchange(async_server, b"POST /api/login HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n")
+
+    # One response each, then the connection is closed: nothing was smuggled through.
+    assert chunked.startswith(b"HTTP/1.1 501 ") and chunked.count(b"HTTP/1.1") == 1
+    assert negative.startswith(b"HTTP/1.1 400 ")
+
+
+def test_handler_errors_become_500(async_server, monkeypatch):
+    def broken(*args: object) -> None:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("smartbudget.web.app.render_health_payload", broken)
+    response = _exchange(async_server, b"GET /api/health HTTP/1.1\r\nHost: x\r\n\r\n")
+
+    assert response.startswith(b"HTTP/1.1 500 ")
+
+
+def test_import_body_is_streamed_to_the_handler(async_server):
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=5)
+    conn.request(
+        "POST",
+        "/api/register",
+        body="name=Caio&email=caio@aio.com&password=1234",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    registered = conn.getresponse()
+    registered.read()
+    cookie = registered.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+
+    rows = "".join(f"2026-03-{day:02d};Mercado {day};-{day},50\n" for day in range(1, 29))
+    conn.request(
+        "POST",
+        "/api/import?format=csv",
+        body=("data;descricao;valor\n" + rows * 200).encode("utf-8"),
+        headers={"Cookie": cookie, "Content-Type": "text/csv"},
+    )
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+
+    assert response.status == 201
+    assert payload == {"ok": True, "imported": 5600, "skipped": 0}
+    conn.request("GET", "/api/health")
+    assert conn.getresponse().status == 200
+    conn.close()
+
+
+def test_stalled_request_bodies_do_not_hold_workers(async_server):
+    # Twice as many half-sent bodies as the fixture has workers.
+    stalled = [socket.create_connection(("127.0.0.1", async_server), timeout=5) for _ in range(4)]
+    for sock in stalled:
+        sock.sendall(b"POST /api/login HTTP/1.1\r\nHost: x\r\nContent-Length: 100\r\n\r\nemail=")
+
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=2)
+    conn.request("GET", "/api/health")
+    assert conn.getresponse().status == 200
+    conn.close()
+    for sock in stalled:
+        sock.close()
+
+
+def test_streamed_import_has_a_total_deadline(async_server, monkeypatch):
+    monkeypatch.setattr("smartbudget.web.aio.IMPORT_BODY_TIMEOUT", 0.3)
+    conn = http.client.HTTPConnection("127.0.0.1", async_server, timeout=5)
+    conn.request(
+        "POST",
+        "/api/register",
+        body="name=Caio&email=caio@aio.com&password=1234",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    registered = conn.getresponse()
+    registered.read()
+    cookie = registered.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+    conn.close()
+
+    with socket.create_connection(("127.0.0.1", async_server), timeout=5) as sock:
+        sock.sendall(
+            b"POST /api/import HTTP/1.1\r\nHost: x\r\nContent-Length: 1000\r\n"
+            + f"Cookie: {cookie}\r\n\r\n".encode()
+        )
+        # A byte at a time keeps each read well inside BODY_READ_TIMEOUT.
+        with pytest.raises(OSError):
+            for _ in range(50):
+                sock.sendall(b"x")
+                time.sleep(0.1)
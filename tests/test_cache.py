@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+
+from smartbudget.columnar import ColumnarLedger
+from smartbudget.models import Transaction, TransactionType
+from smartbudget.web.cache import LedgerCache
+
+
+def _loader(calls: list[int]):
+    def load(user_id: int) -> list[Transaction]:
+        calls.append(user_id)
+        return [
+            Transaction(
+                amount=Decimal("10"),
+                description=f"Mercado {user_id}",
+                date=date(2026, 2, 1),
+                category="Alimentação",
+                type=TransactionType.EXPENSE,
+            )
+        ]
+
+    return load
+
+
+def test_ledger_cache_loads_once_per_user():
+    calls: list[int] = []
+    cache = LedgerCache(_loader(calls))
+
+    first = cache.get(1)
+    second = cache.get(1)
+
+    assert first is second
+    assert calls == [1]
+    assert first.transactions[0].description == "Mercado 1"
+
+
+def test_ledger_cache_builds_ledgers_with_the_factory():
+    cache = LedgerCache(_loader([]), ledger_factory=ColumnarLedger)
+
+    ledger = cache.get(1)
+
+    assert isinstance(ledger, ColumnarLedger)
+    assert ledger.monthly_summary(2026, 2).total_expense == Decimal("10")
+
+
+def test_ledger_cache_evicts_least_recently_used():
+    calls: list[int] = []
+    cache = LedgerCache(_loader(calls), max_users=2)
+
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+
+    assert len(cache) == 2
+    assert 1 in cache
+    assert 2 not in cache
+    assert 3 in cache
+
+
+def test_ledger_cache_reloads_after_ttl():
+    calls: list[int] = []
+    cache = LedgerCache(_loader(calls), ttl=0)
+
+    cache.get(1)
+    cache.get(1)
+
+    assert calls == [1, 1]
+
+
+def test_ledger_cache_validates_data_version():
+    calls: list[int] = []
+    versions = {1: 3}
+    cache = LedgerCache(_loader(calls), version_loader=versions.__getitem__, validate=True)
+
+    cache.get(1)
+    assert cache.version(1) == 3
+    cache.get(1)
+    assert calls == [1]
+
+    # Another process wrote for this user.
+    versions[1] = 4
+    cache.get(1)
+    assert calls == [1, 1]
+
+    # A write made and applied here keeps the entry current.
+    versions[1] = 5
+    cache.mark_written(1)
+    cache.get(1)
+    assert calls == [1, 1]
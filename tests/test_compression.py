@@ -0,0 +1,29 @@
+import gzip
+
+from smartbudget.web import compression
+from smartbudget.web.compression import Compressor
+
+
+def test_negotiation_honours_weights_threshold_and_type(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    compressor = Compressor(min_size=100)
+
+    assert compressor.negotiate("gzip, deflate", 500) == "gzip"
+    assert compressor.negotiate("deflate, *;q=0.5", 500) == "gzip"
+    assert compressor.negotiate("gzip;q=0, identity", 500) is None
+    assert compressor.negotiate("br", 500) is None
+    assert compressor.negotiate("gzip", 99) is None
+    assert compressor.negotiate("gzip", 500, "image/png") is None
+    assert compressor.negotiate(None, 500) is None
+
+    compressor.level = 0
+    assert compressor.negotiate("gzip", 500) is None
+
+
+def test_static_variants_are_compressed_once():
+    compressor = Compressor()
+    body = b"body { color: red; }\n" * 200
+
+    first = compressor.compress_static("/static/a.css", body, "gzip")
+    assert compressor.compress_static("/static/a.css", body, "gzip") is first
+    assert gzip.decompress(first) == body
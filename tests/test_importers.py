@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from smartbudget.importers import ImportInterrupted, import_statement, parse_csv, parse_ofx
+from smartbudget.models import TransactionType
+from smartbudget.repositories import TransactionRepository
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20260105120000[-3:BRT]
+<TRNAMT>-35,90
+<MEMO>Uber viagem
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20260106
+<TRNAMT>4500.00
+<NAME>Salario
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_parse_csv_with_portuguese_header_and_signed_amounts():
+    lines = [
+        "data;descrição;valor\n",
+        "05/01/2026;Mercado do bairro;-1.234,56\n",
+        "06/01/2026;Salário;4500,00\n",
+        "sem-data;Quebrado;10\n",
+    ]
+
+    entries = list(parse_csv(lines))
+
+    assert entries[0].amount == Decimal("1234.56")
+    assert entries[0].type is TransactionType.EXPENSE
+    assert entries[0].date == date(2026, 1, 5)
+    assert entries[1].type is TransactionType.INCOME
+    assert entries[2] is None
+
+
+def test_parse_csv_reads_both_separator_styles_and_skips_unsafe_amounts():
+    amounts = ["1,234.56", "-1.234.567,89", "7.5", "Infinity", "NaN", "1e30", "1.234", "12,345", "99999999999"]
+    lines = ["date,description,amount\n"] + [f'2026-01-05,Compra,"{amount}"\n' for amount in amounts]
+
+    parsed = [entry.amount if entry else None for entry in parse_csv(lines)]
+
+    assert parsed == [Decimal("1234.56"), Decimal("1234567.89"), Decimal("7.5")] + [None] * 6
+
+
+def test_unreadable_csv_is_a_value_error(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    _, created = repo.create_user("Ana", "ana@example.com", "1234")
+    lines = ["date,description,amount\n", f'2026-01-05,"{"x" * 200_000}",10\n']
+
+    with pytest.raises(ValueError, match="linha 2"):
+        import_statement(repo, int(created), lines, "csv")
+
+
+def test_interrupted_import_reports_the_rows_already_stored(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    _, created = repo.create_user("Ana", "ana@example.com", "1234")
+    lines = ["date,description,amount\n"] + [f"2026-01-{day:02d},Compra,10\n" for day in range(1, 13)]
+    lines += [f'2026-01-13,"{"x" * 200_000}",10\n']
+
+    with pytest.raises(ImportInterrupted) as raised:
+        import_statement(repo, int(created), lines, "csv", chunk_size=5)
+
+    assert raised.value.result.imported == 10
+    assert len(repo.list_transactions(int(created))) == 10
+
+
+def test_parse_ofx_sgml_blocks():
+    entries = list(parse_ofx(OFX_STATEMENT.splitlines(keepends=True)))
+
+    assert [(entry.description, entry.amount, entry.type) for entry in entries] == [
+        ("Uber viagem", Decimal("35.90"), TransactionType.EXPENSE),
+        ("Salario", Decimal("4500.00"), TransactionType.INCOME),
+    ]
+
+
+def test_import_statement_stores_categorized_rows_in_chunks(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    ok, created = repo.create_user("Ana", "ana@example.com", "1234")
+    assert ok
+    lines = ["date,description,amount,type\n"]
+    lines += [f"2026-02-{day:02d},Uber centro,12.50,expense\n" for day in range(1, 26)]
+    lines += ["2026-02-26,,1,expense\n"]
+
+    result = import_statement(repo, int(created), lines, "csv", chunk_size=10)
+
+    assert (result.imported, result.skipped) == (25, 1)
+    stored = repo.list_transactions(int(created))
+    assert len(stored) == 25
+    assert {txn.category for txn in stored} == {"Transporte"}
+    assert repo.monthly_totals(int(created), 2026, 2).total_expense == Decimal("312.50")
@@ -1,8 +1,12 @@
+import sys
+import threading
 from datetime import date
 from decimal import Decimal
 
-from smartbudget.ai import categorize_transaction
+from smartbudget.ai import CategoryCache, KeywordMatcher, categorize_transaction
+from smartbudget.columnar import ColumnarLedger
 from smartbudget.ledger import Ledger
+from smartbudget.models import CategoryStatus, Transaction, TransactionType
 
 
 def test_keyword_categorization():
@@ -10,6 +14,55 @@ def test_keyword_categorization():
     assert categorize_transaction("Mercado semanal") == "Alimentação"
 
 
+def test_keyword_priority_and_custom_tables():
+    # Across positions the category listed first wins, as with the original loop.
+    assert categorize_transaction("Uber para o restaurante") == "Alimentação"
+    assert categorize_transaction("Transferência recebida") == "Outros"
+
+    matcher = KeywordMatcher({"Transporte": ("uber",), "Delivery": ("uber eats",), "Pets": ("petz",)})
+    assert categorize_transaction("UBER EATS pedido", matcher=matcher) == "Delivery"
+    assert categorize_transaction("uber centro", matcher=matcher) == "Transporte"
+    assert categorize_transaction("Petz ração", matcher=matcher) == "Pets"
+    assert categorize_transaction("mercado", matcher=matcher) == "Outros"
+
+
+def test_category_cache_skips_provider_for_repeated_merchants():
+    calls: list[str] = []
+
+    def provider(description: str) -> str:
+        calls.append(description)
+        return "Streaming"
+
+    cache = CategoryCache(max_entries=2)
+    assert categorize_transaction("Netflix", provider, cache=cache) == "Streaming"
+    assert categorize_transaction("  NETFLIX ", provider, cache=cache) == "Streaming"
+    assert calls == ["Netflix"]
+    assert cache.stats()["hits"] == 1
+
+    categorize_transaction("mercado", provider, cache=cache)
+    categorize_transaction("uber", provider, cache=cache)
+    assert len(cache) == 2
+    assert cache.get("netflix") is None
+
+
+def test_category_cache_keeps_only_provider_answers():
+    cache = CategoryCache()
+    assert categorize_transaction("Uber centro", cache=cache) == "Transporte"
+    assert len(cache) == 0
+
+    assert categorize_transaction("Uber centro", lambda description: "Mobilidade", cache=cache) == "Mobilidade"
+    assert cache.get("uber centro") == "Mobilidade"
+
+
+def test_category_cache_does_not_store_failed_provider_calls():
+    def failing(description: str) -> str:
+        raise TimeoutError
+
+    cache = CategoryCache()
+    assert categorize_transaction("Uber centro", failing, cache=cache) == "Transporte"
+    assert cache.get("uber centro") is None
+
+
 def test_monthly_summary_and_insight():
     ledger = Ledger()
     d = date(2026, 2, 10)
@@ -25,3 +78,128 @@ def test_monthly_summary_and_insight():
 
     insight = ledger.monthly_insight(2026, 2)
     assert "Moradia" in insight
+
+
+def test_month_rollups_track_each_period():
+    ledger = Ledger()
+    ledger.add_income(Decimal("1000"), "Salário", date(2025, 12, 5))
+    ledger.add_expense(Decimal("50"), "cinema", date(2025, 12, 20))
+    ledger.add_expense(Decimal("70"), "uber", date(2026, 1, 3))
+    ledger.add_expense(Decimal("30"), "metrô", date(2026, 1, 4))
+
+    december = ledger.monthly_summary(2025, 12)
+    assert december.total_income == Decimal("1000")
+    assert december.total_expense == Decimal("50")
+
+    assert ledger.expense_by_category(2026, 1) == {"Transporte": Decimal("100")}
+    assert ledger.top_expense_category(2026, 1) == "Transporte"
+    assert [txn.description for txn in ledger.transactions_for(2026, 1)] == ["uber", "metrô"]
+    assert ledger.transactions_for(2026, 2) == ()
+    assert ledger.top_expense_category(2026, 2) == "Sem gastos"
+
+    ledger.clear()
+    assert ledger.monthly_summary(2025, 12).total_income == Decimal("0")
+
+
+def test_recategorize_moves_amount_between_categories():
+    ledger = Ledger()
+    when = date(2026, 3, 3)
+    txn = ledger.add_expense(Decimal("60"), "Netflix", when, category="Lazer")
+    txn.id = 10
+    ledger.add_expense(Decimal("40"), "cinema", when)
+
+    assert ledger.recategorize(10, when, "Assinaturas")
+    assert ledger.expense_by_category(2026, 3) == {"Lazer": Decimal("40"), "Assinaturas": Decimal("60")}
+    assert ledger.top_expense_category(2026, 3) == "Assinaturas"
+    assert not ledger.recategorize(99, when, "Outros")
+
+
+def test_range_reports_come_from_month_rollups():
+    ledger = Ledger()
+    ledger.add_income(Decimal("3000"), "Salário", date(2025, 11, 5))
+    ledger.add_expense(Decimal("900"), "Aluguel", date(2025, 11, 10), category="Moradia")
+    ledger.add_income(Decimal("3000"), "Salário", date(2025, 12, 5))
+    ledger.add_expense(Decimal("300"), "Mercado", date(2025, 12, 8), category="Alimentação")
+    ledger.add_expense(Decimal("900"), "Aluguel", date(2026, 1, 10), category="Moradia")
+
+    series = ledger.monthly_series((2025, 11), (2026, 2))
+    assert [item.month for item in series] == ["2025-11", "2025-12", "2026-01", "2026-02"]
+    assert [item.balance for item in series] == [Decimal("2100"), Decimal("2700"), Decimal("-900"), Decimal("0")]
+
+    totals = ledger.range_summary((2025, 12), (2026, 1))
+    assert (totals.total_income, totals.total_expense) == (Decimal("3000"), Decimal("1200"))
+    assert ledger.category_breakdown((2025, 11), (2026, 1)) == {
+        "Moradia": Decimal("1800"),
+        "Alimentação": Decimal("300"),
+    }
+
+    rolling = ledger.rolling_averages((2026, 1), (2026, 2), window=3)
+    # January averages Nov-Jan, so months before the range fill the window.
+    assert [(item.month, item.total_income, item.total_expense) for item in rolling] == [
+        ("2026-01", Decimal("2000.00"), Decimal("700.00")),
+        ("2026-02", Decimal("1000.00"), Decimal("400.00")),
+    ]
+
+
+def test_columnar_ledger_matches_the_object_ledger():
+    history = [
+        Transaction(Decimal("3000"), "Salário", date(2025, 12, 5), "Receita", TransactionType.INCOME, id=1),
+        Transaction(Decimal("89.90"), "Netflix", date(2025, 12, 9), "Lazer", TransactionType.EXPENSE, id=2),
+        Transaction(Decimal("120.10"), "Mercado", date(2026, 1, 2), "Alimentação", TransactionType.EXPENSE, id=3),
+        Transaction(
+            Decimal("45"), "Uber", date(2026, 1, 3), "Outros", TransactionType.EXPENSE, 4, CategoryStatus.PENDING
+        ),
+        Transaction(Decimal("3000"), "Salário", date(2026, 1, 5), "Receita", TransactionType.INCOME, id=5),
+    ]
+    objects, columns = Ledger(), ColumnarLedger()
+    objects.record_transactions(history)
+    columns.record_transactions(history[:3])
+    for txn in history[3:]:
+        columns.record_transaction(txn)
+
+    assert len(columns) == 5
+    assert columns.transactions == objects.transactions
+    assert columns.transactions_for(2026, 1) == objects.transactions_for(2026, 1)
+    assert columns.transactions_for(2026, 1)[1].category_status is CategoryStatus.PENDING
+    for ledger in (objects, columns):
+        assert ledger.recategorize(4, date(2026, 1, 3), "Transporte")
+    assert columns.transactions_for(2026, 1)[1].category_status is CategoryStatus.FINAL
+
+    start, end = (2025, 12), (2026, 2)
+    for year, month in [(2025, 12), (2026, 1), (2026, 2)]:
+        assert columns.monthly_summary(year, month) == objects.monthly_summary(year, month)
+        assert columns.expense_by_category(year, month) == objects.expense_by_category(year, month)
+        assert columns.top_expense_category(year, month) == objects.top_expense_category(year, month)
+    assert columns.category_breakdown(start, end) == objects.category_breakdown(start, end)
+    assert columns.rolling_averages(start, end, window=2) == objects.rolling_averages(start, end, window=2)
+    # Amounts are kept in cents but come back written as they were stored.
+    assert [str(txn.amount) for txn in columns.transactions] == ["3000", "89.90", "120.10", "45", "3000"]
+    assert str(columns.monthly_summary(2026, 1).total_expense) == str(objects.monthly_summary(2026, 1).total_expense)
+
+    columns.clear()
+    assert columns.transactions == ()
+    assert columns.monthly_summary(2026, 1).total_expense == Decimal("0")
+
+
+def test_concurrent_writers_keep_rollups_exact():
+    ledger = Ledger()
+    when = date(2026, 2, 10)
+
+    def write() -> None:
+        for _ in range(5_000):
+            ledger.record_transaction(Transaction(Decimal("1"), "Café", when, "Alimentação", TransactionType.EXPENSE))
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    previous = sys.getswitchinterval()
+    # Switch threads as often as possible to make lost updates likely without the lock.
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous)
+
+    assert ledger.monthly_summary(2026, 2).total_expense == Decimal("20000")
+    assert ledger.expense_by_category(2026, 2) == {"Alimentação": Decimal("20000")}
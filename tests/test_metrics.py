@@ -0,0 +1,38 @@
+from smartbudget.metrics import Registry
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.histogram("app_request_seconds", "Request time.", ("route",), buckets=(0.1, 1.0))
+    responses = registry.counter("app_responses_total", "Responses.", ("status",))
+    registry.gauge("app_cache_entries", "Entries.", lambda: 3)
+
+    requests.observe(0.05, "/")
+    requests.observe(0.5, "/")
+    requests.observe(2.0, "/")
+    responses.inc("200")
+    responses.inc("200")
+    responses.inc('4"04')
+
+    assert requests.count("/") == 3
+    assert responses.value("200") == 2
+    assert registry.render().splitlines() == [
+        "# HELP app_cache_entries Entries.",
+        "# TYPE app_cache_entries gauge",
+        "app_cache_entries 3",
+        "# HELP app_request_seconds Request time.",
+        "# TYPE app_request_seconds histogram",
+        'app_request_seconds_bucket{route="/",le="0.1"} 1',
+        'app_request_seconds_bucket{route="/",le="1.0"} 2',
+        'app_request_seconds_bucket{route="/",le="+Inf"} 3',
+        'app_request_seconds_sum{route="/"} 2.55',
+        'app_request_seconds_count{route="/"} 3',
+        "# HELP app_responses_total Responses.",
+        "# TYPE app_responses_total counter",
+        'app_responses_total{status="200"} 2',
+        'app_responses_total{status="4\\"04"} 1',
+    ]
+
+    registry.reset()
+    assert requests.count("/") == 0
+    assert "app_responses_total{" not in registry.render()
@@ -1,8 +1,16 @@
+import sqlite3
+import threading
+from contextlib import closing
 from datetime import date
 from decimal import Decimal
 
-from smartbudget.models import Transaction, TransactionType
+import pytest
+
+from smartbudget.ai import CategoryCache
+from smartbudget.models import CategoryStatus, Transaction, TransactionType
 from smartbudget.repositories import TransactionRepository
+from smartbudget.repositories.connection import ConnectionPool
+from smartbudget.repositories.migrations import SCHEMA_VERSION
 
 
 def test_repository_persists_transactions(tmp_path):
@@ -39,3 +47,205 @@ def test_user_authentication_roundtrip(tmp_path):
     user_id, name = payload
     assert user_id == int(created)
     assert name == "Bruno"
+
+
+def test_repository_aggregates_in_sql(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    ok, created = repo.create_user("Caio", "caio@example.com", "1234")
+    assert ok
+    user_id = int(created)
+
+    def add(amount: str, description: str, when: date, category: str, kind: TransactionType) -> None:
+        repo.insert_transaction(
+            user_id,
+            Transaction(amount=Decimal(amount), description=description, date=when, category=category, type=kind),
+        )
+
+    add("3000", "Salário", date(2026, 3, 1), "Receita", TransactionType.INCOME)
+    add("0.10", "Pão", date(2026, 3, 2), "Alimentação", TransactionType.EXPENSE)
+    add("0.20", "Leite", date(2026, 3, 31), "Alimentação", TransactionType.EXPENSE)
+    add("900", "Aluguel", date(2026, 3, 5), "Moradia", TransactionType.EXPENSE)
+    add("50", "Cinema", date(2026, 4, 1), "Lazer", TransactionType.EXPENSE)
+
+    summary = repo.monthly_totals(user_id, 2026, 3)
+    assert summary.total_income == Decimal("3000")
+    assert summary.total_expense == Decimal("900.30")
+
+    assert repo.category_totals(user_id, 2026, 3) == {"Moradia": Decimal("900"), "Alimentação": Decimal("0.30")}
+    assert [txn.description for txn in repo.list_transactions(user_id, period=(2026, 4))] == ["Cinema"]
+    assert repo.monthly_totals(user_id, 2026, 5).total_expense == Decimal("0")
+
+
+def test_legacy_database_is_migrated_in_place(tmp_path):
+    db_path = tmp_path / "legacy.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+            "email TEXT NOT NULL UNIQUE, password_hash TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, amount TEXT NOT NULL, "
+            "description TEXT NOT NULL, date TEXT NOT NULL, category TEXT NOT NULL, type TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO transactions (amount, description, date, category, type) "
+            "VALUES ('19.99', 'Netflix', '2026-01-10', 'Lazer', 'expense'), "
+            "('12.345', 'Padaria', '2026-01-11', 'Alimentação', 'expense'), "
+            "('0.125', 'Taxa', '2026-01-12', 'Outros', 'expense')"
+        )
+    conn.close()
+
+    TransactionRepository(db_path=str(db_path))
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        # Rounded half-even, exactly as to_cents does for new rows.
+        assert conn.execute("SELECT amount_cents FROM transactions ORDER BY id").fetchall() == [(1999,), (1234,), (12,)]
+        plan = " ".join(
+            row[3]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM transactions WHERE user_id = 1 AND date >= '2026-01-01'"
+            )
+        )
+        assert "idx_transactions_user_date" in plan
+
+    # Reopening an up-to-date database is a no-op.
+    TransactionRepository(db_path=str(db_path))
+
+
+def test_connection_pool_reuses_wal_connections(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db")
+    with pool.connection() as first:
+        assert first.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    with pool.connection() as second:
+        assert second is first
+    pool.close()
+
+
+def test_connection_pool_bounds_open_connections(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", busy_timeout=0.05, max_connections=2)
+    with pool.connection(), pool.connection():
+        with pytest.raises(sqlite3.OperationalError, match="no free connection"):
+            with pool.connection():
+                pass
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    pool.close()
+
+
+def test_concurrent_writers_do_not_lock_each_other(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    ok, created = repo.create_user("Duda", "duda@example.com", "1234")
+    assert ok
+    user_id = int(created)
+    txn = Transaction(
+        amount=Decimal("1.50"),
+        description="Café",
+        date=date(2026, 2, 19),
+        category="Alimentação",
+        type=TransactionType.EXPENSE,
+    )
+
+    errors: list[BaseException] = []
+
+    def write() -> None:
+        try:
+            for _ in range(25):
+                repo.insert_transaction(user_id, txn)
+                assert repo.get_user(user_id) == (user_id, "Duda")
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Failures inside threads do not fail the test by themselves.
+    if errors:
+        raise errors[0]
+    assert len(repo.list_transactions(user_id)) == 200
+    repo.close()
+
+
+def test_insert_many_consumes_iterators_in_chunks(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    ok, created = repo.create_user("Eli", "eli@example.com", "1234")
+    assert ok
+
+    rows = (
+        Transaction(
+            amount=Decimal("2.00"),
+            description=f"Compra {index}",
+            date=date(2026, 1, 1),
+            category="Outros",
+            type=TransactionType.EXPENSE,
+        )
+        for index in range(2500)
+    )
+
+    assert repo.insert_many(int(created), rows, chunk_size=1000) == 2500
+    assert repo.monthly_totals(int(created), 2026, 1).total_expense == Decimal("5000")
+
+
+def test_category_cache_persists_in_sqlite(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    CategoryCache(store=repo).put("Padaria  Pão Quente", "Alimentação")
+
+    fresh = CategoryCache(store=repo)
+    assert fresh.get("padaria pão quente") == "Alimentação"
+    assert fresh.stats()["hits"] == 1
+
+
+def test_transaction_pages_use_a_date_id_keyset(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    days = [3, 1, 3, 2, 5]
+    for index, day in enumerate(days):
+        repo.insert_transaction(
+            1,
+            Transaction(
+                amount=Decimal("1.00"),
+                description=f"Compra {index}",
+                date=date(2026, 2, day),
+                category="Outros",
+                type=TransactionType.EXPENSE,
+            ),
+        )
+    repo.insert_transaction(
+        1, Transaction(Decimal("9"), "Outro mês", date(2026, 3, 1), "Outros", TransactionType.EXPENSE)
+    )
+
+    first = repo.list_transactions_page(1, (2026, 2), limit=2)
+    last = first[-1]
+    rest = repo.list_transactions_page(1, (2026, 2), limit=10, before=(last.date, last.id))
+
+    assert [txn.description for txn in first] == ["Compra 4", "Compra 2"]
+    assert [txn.description for txn in rest] == ["Compra 0", "Compra 3", "Compra 1"]
+
+
+def test_listed_transactions_share_repeated_values(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    _, created = repo.create_user("Ana", "ana@example.com", "1234")
+    user_id = int(created)
+    when = date(2026, 2, 19)
+    repo.insert_many(
+        user_id,
+        [
+            Transaction(Decimal("10"), "Uber", when, "Transporte", TransactionType.EXPENSE),
+            Transaction(Decimal("10"), "Uber", when, "Transporte", TransactionType.EXPENSE),
+            Transaction(Decimal("2500.50"), "Salário", date(2026, 2, 5), "Receita", TransactionType.INCOME),
+        ],
+    )
+    pending = Transaction(Decimal("8.90"), "Padaria", when, "Outros", TransactionType.EXPENSE)
+    pending.category_status = CategoryStatus.PENDING
+    repo.insert_transaction(user_id, pending)
+
+    first, second, salary, bakery = repo.list_transactions(user_id)
+    assert first.amount is second.amount and first.date is second.date
+    assert first.description is second.description and first.category is second.category
+    assert str(first.amount) == "10" and str(salary.amount) == "2500.50"
+    assert salary.type is TransactionType.INCOME and salary.category_status is CategoryStatus.FINAL
+    assert bakery.type is TransactionType.EXPENSE and bakery.category_status is CategoryStatus.PENDING
+    assert [txn.id for txn in repo.list_transactions_page(user_id, (2026, 2), limit=2)] == [bakery.id, second.id]
+    assert repo.list_pending_categorizations() == [(user_id, bakery)]
@@ -0,0 +1,79 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork mode needs os.fork")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(port: int, method: str, path: str, body: str | None = None, cookie: str | None = None):
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    if cookie:
+        headers["Cookie"] = cookie
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    conn.close()
+    return response, payload
+
+
+def _wait_until_serving(port: int) -> None:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            _request(port, "GET", "/api/health")
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise AssertionError("server did not start")
+
+
+def test_workers_share_sessions_and_data(tmp_path):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from smartbudget.web.app import run; run('127.0.0.1', {port}, workers=2)"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_serving(port)
+        response, _ = _request(port, "POST", "/api/register", "name=Ana&email=ana@teste.com&password=1234")
+        cookie = response.getheader("Set-Cookie").split(";", maxsplit=1)[0]
+
+        for day in range(1, 7):
+            response, _ = _request(
+                port,
+                "POST",
+                "/api/transactions",
+                f"transaction_type=expense&amount=10&description=Uber&txn_date=2026-07-{day:02d}",
+                cookie,
+            )
+            assert response.status == 201
+            # Whichever worker answers must see the session and every write so far.
+            _, body = _request(port, "GET", "/api/dashboard?period=2026-07", cookie=cookie)
+            assert len(json.loads(body)["transactions"]) == day
+
+        process.send_signal(signal.SIGHUP)
+        time.sleep(0.5)
+        _, body = _request(port, "GET", "/api/session", cookie=cookie)
+        assert json.loads(body)["authenticated"] is True
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
@@ -0,0 +1,79 @@
+import pstats
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from smartbudget.profiling import RequestProfiler, StackSampler
+
+
+def _busy_loop(stop: list[bool]) -> None:
+    # No Python-level calls in the loop: every sample must land in this frame.
+    while not stop:
+        sum(range(100))
+
+
+def test_sampler_aggregates_collapsed_stacks(tmp_path):
+    stop: list[bool] = []
+    worker = threading.Thread(target=_busy_loop, args=(stop,))
+    worker.start()
+    sampler = StackSampler(tmp_path)
+    try:
+        for _ in range(5):
+            sampler.sample()
+    finally:
+        stop.append(True)
+        worker.join()
+
+    assert sampler.samples == 5
+    stacks = sampler.collapsed()
+    busy = [stack for stack in stacks if stack.endswith("test_profiling:_busy_loop")]
+    assert busy and stacks[busy[0]] == 5
+    assert busy[0].startswith("threading:Thread._bootstrap;")
+
+    path = sampler.dump()
+    assert path == tmp_path / sampler.path.name
+    assert f"{busy[0]} 5\n" in path.read_text(encoding="utf-8")
+
+
+def test_request_profiler_writes_one_report_per_call(tmp_path):
+    profiler = RequestProfiler(tmp_path, admins=[7])
+    assert profiler.allows(7) and not profiler.allows(8)
+
+    with profiler.profile("GET /api/dashboard") as path:
+        # A concurrent call is not profiled instead of waiting.
+        with profiler.profile("GET /") as skipped:
+            assert skipped is None
+        sum(range(1000))
+
+    assert path is not None and path.name.endswith("-GET-api-dashboard.prof")
+    assert pstats.Stats(str(path)).total_calls > 0
+    assert path.with_suffix(".txt").read_text(encoding="utf-8").startswith("GET /api/dashboard\n")
+
+    with RequestProfiler().profile("GET /") as disabled:
+        assert disabled is None
+
+
+def _wait_for_result(release: threading.Event) -> None:
+    release.wait(timeout=5)
+
+
+def test_sampler_keeps_blocked_requests_and_drops_idle_workers(tmp_path):
+    release = threading.Event()
+    waiting = threading.Thread(target=_wait_for_result, args=(release,))
+    waiting.start()
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(sum, range(10)).result()
+    sampler = StackSampler(tmp_path)
+    try:
+        deadline = time.monotonic() + 2
+        # Wait until the thread has entered Event.wait.
+        while time.monotonic() < deadline and not any("Event.wait" in stack for stack in sampler.collapsed()):
+            sampler.sample()
+    finally:
+        release.set()
+        waiting.join()
+        executor.shutdown()
+
+    stacks = list(sampler.collapsed())
+    assert any("test_profiling:_wait_for_result;threading:Event.wait" in stack for stack in stacks)
+    assert not any("concurrent.futures.thread:_worker" in stack for stack in stacks)
@@ -0,0 +1,34 @@
+from smartbudget.web.render_cache import RenderCache
+
+
+def test_write_drops_its_period_and_carries_the_others_forward():
+    cache = RenderCache()
+    cache.put(1, (2026, 1), "html", 4, b"janeiro")
+    cache.put(1, (2026, 2), "html", 4, (b"fev", b"ereiro"))
+    cache.put(2, (2026, 1), "html", 9, b"outro usuario")
+
+    cache.invalidate_period(1, (2026, 1), version=5)
+
+    assert cache.get(1, (2026, 1), "html", 5) is None
+    assert cache.get(1, (2026, 2), "html", 5) == (b"fev", b"ereiro")
+    # A version the cache never saw (a write from another process) is a miss.
+    assert cache.get(1, (2026, 2), "html", 6) is None
+    assert cache.get(2, (2026, 1), "html", 9) == b"outro usuario"
+
+    cache.invalidate_user(2)
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] == len(b"fevereiro")
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_is_bounded_by_body_size():
+    cache = RenderCache(max_bytes=100)
+    for month in range(1, 6):
+        cache.put(1, (2026, month), "json", 0, bytes(25))
+    cache.put(1, (2026, 6), "json", 0, bytes(26))
+
+    assert cache.stats()["bytes"] <= 100
+    assert cache.get(1, (2026, 1), "json", 0) is None
+    assert cache.get(1, (2026, 5), "json", 0) == bytes(25)
@@ -0,0 +1,35 @@
+from smartbudget.repositories import TransactionRepository
+from smartbudget.web.sessions import MemorySessionStore, SQLiteSessionStore
+
+
+def test_memory_sessions_expire_and_are_bounded():
+    store = MemorySessionStore(max_entries=2)
+    first = store.create(1, "Ana")
+    second = store.create(2, "Bruno")
+    assert store.get(first) == (1, "Ana")
+
+    third = store.create(3, "Caio")
+
+    assert len(store) == 2
+    assert store.get(second) is None
+    assert store.get(third) == (3, "Caio")
+
+    expired = MemorySessionStore(ttl=0)
+    token = expired.create(1, "Ana")
+    assert expired.get(token) is None
+
+
+def test_sqlite_sessions_are_shared_between_stores(tmp_path):
+    repo = TransactionRepository(db_path=str(tmp_path / "smartbudget.db"))
+    token = SQLiteSessionStore(repo).create(7, "Lia")
+
+    other_process = SQLiteSessionStore(TransactionRepository(db_path=str(tmp_path / "smartbudget.db")))
+    assert other_process.get(token) == (7, "Lia")
+
+    other_process.delete(token)
+    assert SQLiteSessionStore(repo).get(token) is None
+
+    repo.create_session("stale", 7, "Lia", expires_at=100.0)
+    assert repo.get_session("stale", now=50.0) == (7, "Lia")
+    assert repo.get_session("stale", now=150.0) is None
+    assert repo.purge_expired_sessions(now=150.0) == 1
@@ -0,0 +1,17 @@
+import pytest
+
+from smartbudget.web.templates import Template
+
+
+def test_template_splits_static_fragments_once():
+    template = Template("<p>$name custa R$$ ${price}</p>")
+
+    assert template.slots == ("name", "price")
+    chunks = template.render_chunks({"name": "Café", "price": b"4,50"})
+    assert chunks == [b"<p>", "Café".encode(), b" custa R$ ", b"4,50", b"</p>"]
+    assert template.render({"name": "Chá", "price": "3"}) == "<p>Chá custa R$ 3</p>"
+
+
+def test_template_rejects_invalid_placeholders():
+    with pytest.raises(ValueError, match="line 2"):
+        Template("<p>\nR$ 10</p>")
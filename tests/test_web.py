@@ -1,8 +1,23 @@
+import gzip
+import http.client
 import json
+import threading
+import time
+from decimal import Decimal
+from http.server import ThreadingHTTPServer
 from urllib.parse import parse_qs
 
+import pytest
+
+from smartbudget.metrics import REQUEST_SECONDS
 from smartbudget.web.app import (
-    ledger,
+    SmartBudgetHandler,
+    batch_categorizer,
+    categorization_queue,
+    category_cache,
+    ledger_cache,
+    profiler,
+    render_cache,
     render_auth_page,
     render_auth_result_payload,
     render_dashboard,
@@ -15,11 +30,40 @@ from smartbudget.web.app import (
 
 
 def setup_function() -> None:
-    ledger.clear()
+    ledger_cache.clear()
+    render_cache.clear()
+    category_cache.clear()
+    repository.clear_category_cache()
     repository.clear_transactions()
     repository.clear_users()
 
 
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), SmartBudgetHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd.server_address
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _login(address: tuple[str, int], email: str, password: str) -> str:
+    conn = http.client.HTTPConnection(*address)
+    conn.request(
+        "POST",
+        "/api/login",
+        body=f"email={email}&password={password}",
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader("Set-Cookie")
+    conn.close()
+    assert cookie
+    return cookie.split(";", maxsplit=1)[0]
+
+
 def test_auth_page_loads():
     html = render_auth_page()
     assert "IA Finance" in html
@@ -45,6 +89,21 @@ def test_save_transaction_and_render_for_user():
     assert "tipo-expense" in html
 
 
+def test_save_transaction_rejects_amounts_the_ledger_cannot_hold():
+    ok, created = repository.create_user("Ana", "ana@example.com", "1234")
+    assert ok is True
+    user_id = int(created)
+
+    for amount in ("Infinity", "NaN", "1e30", "12.345"):
+        form = parse_qs(f"transaction_type=expense&amount={amount}&description=Uber&txn_date=2026-02-19")
+        assert save_transaction(user_id, form) == "Verifique valor e data antes de salvar."
+
+    form = parse_qs("transaction_type=expense&amount=12.340&description=Uber&txn_date=2026-02-19")
+    assert save_transaction(user_id, form) is None
+    assert repository.monthly_totals(user_id, 2026, 2).total_expense == Decimal("12.34")
+    assert ledger_cache.get(user_id).monthly_summary(2026, 2).total_expense == Decimal("12.34")
+
+
 def test_data_isolated_by_user():
     ok_1, user_1 = repository.create_user("Ana", "ana@teste.com", "1234")
     ok_2, user_2 = repository.create_user("Bruno", "bruno@teste.com", "1234")
@@ -82,6 +141,26 @@ def test_period_filter_hides_other_month_transactions():
     assert "Mercado Janeiro" not in february
 
 
+def test_periods_at_the_edges_of_the_calendar_render(server):
+    ok, user = repository.create_user("Ana", "ana3@teste.com", "1234")
+    assert ok
+    save_transaction(
+        int(user), parse_qs("transaction_type=expense&amount=100&description=Mercado+Futuro&txn_date=9999-12-20")
+    )
+
+    assert "Mercado Futuro" in render_dashboard(user_name="Ana", user_id=int(user), period="9999-12")
+    assert "Mercado Futuro" not in render_dashboard(user_name="Ana", user_id=int(user), period="0-01")
+
+    cookie = _login(server, "ana3@teste.com", "1234")
+    for path in ("/?period=9999-12", "/?period=0-01", "/api/transactions?period=9999-12", "/api/dashboard?period=0-01"):
+        conn = http.client.HTTPConnection(*server)
+        conn.request("GET", path, headers={"Cookie": cookie})
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        assert response.status == 200, path
+
+
 def test_status_financeiro_destacado():
     ok, user = repository.create_user("Carla", "carla@teste.com", "1234")
     assert ok
@@ -126,3 +205,385 @@ def test_render_auth_result_payload_json():
 
     success = json.loads(render_auth_result_payload(True, "OK", user_id=1, user_name="Ana").decode("utf-8"))
     assert success == {"ok": True, "message": "OK", "user": {"id": 1, "name": "Ana"}}
+
+
+def test_saved_transaction_updates_cached_ledger():
+    ok, user = repository.create_user("Eva", "eva@teste.com", "1234")
+    assert ok
+
+    render_dashboard(user_name="Eva", user_id=int(user), period="2026-04")
+    cached = ledger_cache.get(int(user))
+
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=80&description=Padaria&txn_date=2026-04-02"))
+
+    assert ledger_cache.get(int(user)) is cached
+    assert cached.transactions[-1].description == "Padaria"
+    assert "Padaria" in render_dashboard(user_name="Eva", user_id=int(user), period="2026-04")
+
+
+def test_import_endpoint_streams_csv_statement(server):
+    ok, user = repository.create_user("Gabi", "gabi@teste.com", "1234")
+    assert ok
+    cookie = _login(server, "gabi@teste.com", "1234")
+    render_dashboard(user_name="Gabi", user_id=int(user), period="2026-05")
+
+    body = "date,description,amount\n2026-05-02,Netflix,-39.90\n2026-05-05,Salario,3000\n".encode("utf-8")
+    conn = http.client.HTTPConnection(*server)
+    conn.request("POST", "/api/import?format=csv", body=body, headers={"Cookie": cookie, "Content-Type": "text/csv"})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+
+    assert response.status == 201
+    assert payload == {"ok": True, "imported": 2, "skipped": 0}
+    dashboard = json.loads(render_dashboard_payload(user_id=int(user), period="2026-05"))
+    assert dashboard["summary"]["expense"] == "39.90"
+    assert dashboard["top_category"] == "Lazer"
+
+
+def test_interrupted_import_reports_what_was_kept(server):
+    ok, user = repository.create_user("Gil", "gil@teste.com", "1234")
+    assert ok
+    cookie = _login(server, "gil@teste.com", "1234")
+
+    rows = "".join(f"2026-05-{day:02d},Compra,-10\n" for day in range(1, 29)) * 40
+    body = f'date,description,amount\n{rows}2026-05-29,"{"x" * 200_000}",-10\n'.encode("utf-8")
+    conn = http.client.HTTPConnection(*server)
+    conn.request("POST", "/api/import?format=csv", body=body, headers={"Cookie": cookie, "Content-Type": "text/csv"})
+    response = conn.getresponse()
+    payload = json.loads(response.read())
+    conn.close()
+
+    assert response.status == 400
+    assert payload["ok"] is False
+    assert payload["imported"] == 1000
+    assert "1000 transações anteriores foram importadas" in payload["error"]
+    assert len(repository.list_transactions(int(user))) == 1000
+
+
+def test_expense_is_stored_before_ai_refines_category():
+    ok, user = repository.create_user("Hugo", "hugo@teste.com", "1234")
+    assert ok
+    release = threading.Event()
+
+    def slow_provider(descriptions: list[str]) -> list[str]:
+        release.wait(timeout=2)
+        return ["Streaming"] * len(descriptions)
+
+    batch_categorizer.provider = slow_provider
+    try:
+        started = time.monotonic()
+        error = save_transaction(
+            int(user), parse_qs("transaction_type=expense&amount=39.90&description=Netflix&txn_date=2026-06-01")
+        )
+        assert error is None
+        assert time.monotonic() - started < 0.5
+
+        pending = json.loads(render_dashboard_payload(user_id=int(user), period="2026-06"))["transactions"][0]
+        assert (pending["category"], pending["category_status"]) == ("Lazer", "pending")
+        assert "(em análise)" in render_dashboard(user_name="Hugo", user_id=int(user), period="2026-06")
+
+        release.set()
+        categorization_queue.join()
+    finally:
+        batch_categorizer.provider = None
+
+    refined = json.loads(render_dashboard_payload(user_id=int(user), period="2026-06"))
+    assert refined["transactions"][0]["category"] == "Streaming"
+    assert refined["transactions"][0]["category_status"] == "final"
+    assert refined["top_category"] == "Streaming"
+    stored = repository.list_transactions(int(user))[0]
+    assert (stored.category, stored.category_status.value) == ("Streaming", "final")
+
+
+def test_session_lookup_does_not_query_users(server, monkeypatch):
+    ok, _ = repository.create_user("Ivo", "ivo@teste.com", "1234")
+    assert ok
+    cookie = _login(server, "ivo@teste.com", "1234")
+
+    def unexpected(user_id: int) -> None:
+        raise AssertionError("get_user should not run on authenticated requests")
+
+    monkeypatch.setattr(repository, "get_user", unexpected)
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/session", headers={"Cookie": cookie})
+    payload = json.loads(conn.getresponse().read())
+    conn.close()
+
+    assert payload["authenticated"] is True
+    assert payload["user"]["name"] == "Ivo"
+
+
+def test_transactions_are_paginated_with_a_cursor(server):
+    ok, user = repository.create_user("Juli", "juli@teste.com", "1234")
+    assert ok
+    for day in range(1, 6):
+        save_transaction(
+            int(user), parse_qs(f"transaction_type=expense&amount=10&description=Compra+{day}&txn_date=2026-07-0{day}")
+        )
+    cookie = _login(server, "juli@teste.com", "1234")
+
+    def get(path: str) -> tuple[int, dict]:
+        conn = http.client.HTTPConnection(*server)
+        conn.request("GET", path, headers={"Cookie": cookie})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    status, summary = get("/api/dashboard/summary?period=2026-07")
+    assert status == 200
+    assert summary["summary"]["expense"] == "50"
+    assert "transactions" not in summary
+
+    seen = []
+    cursor = ""
+    while True:
+        status, page = get(f"/api/transactions?period=2026-07&limit=2&cursor={cursor}")
+        assert status == 200
+        seen.extend(txn["description"] for txn in page["transactions"])
+        if page["next_cursor"] is None:
+            break
+        cursor = page["next_cursor"]
+    assert seen == [f"Compra {day}" for day in range(5, 0, -1)]
+
+    _, dashboard = get("/api/dashboard?period=2026-07&limit=3")
+    assert len(dashboard["transactions"]) == 3
+    assert dashboard["next_cursor"]
+    assert get("/api/transactions?period=2026-07&cursor=@@")[0] == 400
+
+    html = render_dashboard(user_name="Juli", user_id=int(user), period="2026-07", cursor=dashboard["next_cursor"])
+    assert "Compra 2" in html and "Compra 3" not in html
+    assert "Mais recentes" in html
+
+
+def test_static_assets_are_served_from_memory_with_validators(server, monkeypatch):
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/static/styles.css")
+    response = conn.getresponse()
+    css = response.read()
+    etag = response.getheader("ETag")
+    assert response.status == 200 and css
+    assert etag and not etag.startswith("W/")
+    assert "max-age" in response.getheader("Cache-Control")
+
+    monkeypatch.setattr("pathlib.Path.read_bytes", lambda self: pytest.fail("static file re-read from disk"))
+    conn.request("GET", "/static/styles.css", headers={"If-None-Match": etag})
+    response = conn.getresponse()
+    assert response.status == 304
+    assert response.read() == b""
+    conn.request("GET", "/static/styles.css", headers={"If-Modified-Since": response.getheader("Last-Modified")})
+    assert conn.getresponse().status == 304
+    conn.close()
+
+
+def test_dashboard_revalidation_skips_rendering(server, monkeypatch):
+    ok, user = repository.create_user("Leo", "leo@teste.com", "1234")
+    assert ok
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=30&description=Padaria&txn_date=2026-08-03"))
+    cookie = _login(server, "leo@teste.com", "1234")
+
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/dashboard?period=2026-08", headers={"Cookie": cookie})
+    response = conn.getresponse()
+    response.read()
+    etag = response.getheader("ETag")
+    assert response.status == 200 and etag
+
+    with monkeypatch.context() as patched:
+        patched.setattr("smartbudget.web.app.render_dashboard_payload", lambda *args, **kwargs: pytest.fail("rendered"))
+        conn.request("GET", "/api/dashboard?period=2026-08", headers={"Cookie": cookie, "If-None-Match": etag})
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 304
+
+    conn.request("GET", "/api/dashboard?period=2026-07", headers={"Cookie": cookie, "If-None-Match": etag})
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 200
+
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=12&description=Café&txn_date=2026-08-04"))
+    conn.request("GET", "/api/dashboard?period=2026-08", headers={"Cookie": cookie, "If-None-Match": etag})
+    response = conn.getresponse()
+    assert "Café" in response.read().decode("utf-8")
+    assert response.status == 200
+    assert response.getheader("ETag") != etag
+    conn.close()
+
+
+def test_responses_are_gzipped_when_accepted(server, monkeypatch):
+    ok, user = repository.create_user("Mia", "mia@teste.com", "1234")
+    assert ok
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=30&description=Padaria&txn_date=2026-08-03"))
+    cookie = _login(server, "mia@teste.com", "1234")
+    monkeypatch.setattr("smartbudget.web.compression.brotli", None)
+
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/?period=2026-08", headers={"Cookie": cookie, "Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    html = gzip.decompress(response.read()).decode("utf-8")
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("Vary") == "Accept-Encoding"
+    assert "Padaria" in html
+
+    conn.request("GET", "/api/session", headers={"Cookie": cookie, "Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    assert json.loads(response.read())["authenticated"] is True
+    assert response.getheader("Content-Encoding") is None
+
+    conn.request("GET", "/static/styles.css", headers={"Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    gzipped_etag = response.getheader("ETag")
+    css = gzip.decompress(response.read())
+    conn.request("GET", "/static/styles.css")
+    response = conn.getresponse()
+    assert response.read() == css
+    assert response.getheader("ETag") != gzipped_etag
+    conn.close()
+
+
+def test_rendered_views_are_cached_until_their_period_changes():
+    ok, user = repository.create_user("Nina", "nina@teste.com", "1234")
+    assert ok
+    user_id = int(user)
+    save_transaction(user_id, parse_qs("transaction_type=expense&amount=30&description=Padaria&txn_date=2026-09-03"))
+
+    first = render_dashboard(user_name="Nina", user_id=user_id, period="2026-09")
+    assert render_dashboard(user_name="Nina", user_id=user_id, period="2026-09", error="Ops") != first
+    assert render_dashboard_payload(user_id=user_id, period="2026-09") == render_dashboard_payload(
+        user_id=user_id, period="2026-09"
+    )
+    assert render_cache.stats()["hits"] == 2
+
+    save_transaction(user_id, parse_qs("transaction_type=expense&amount=5&description=Cafe&txn_date=2026-10-01"))
+    assert render_dashboard(user_name="Nina", user_id=user_id, period="2026-09") == first
+    assert render_cache.stats()["hits"] == 3
+
+    save_transaction(user_id, parse_qs("transaction_type=expense&amount=7&description=Sorvete&txn_date=2026-09-20"))
+    assert "Sorvete" in render_dashboard(user_name="Nina", user_id=user_id, period="2026-09")
+    assert "Sorvete" in json.loads(render_dashboard_payload(user_id=user_id, period="2026-09"))["transactions"][-1]["description"]
+
+
+def test_large_dashboards_are_streamed(server, monkeypatch):
+    ok, user = repository.create_user("Otto", "otto@teste.com", "1234")
+    assert ok
+    for day in range(1, 6):
+        save_transaction(
+            int(user), parse_qs(f"transaction_type=expense&amount=1{day}&description=Compra+{day}&txn_date=2026-11-0{day}")
+        )
+    cookie = _login(server, "otto@teste.com", "1234")
+    expected = render_dashboard_payload(user_id=int(user), period="2026-11")
+    monkeypatch.setattr("smartbudget.web.app.STREAM_THRESHOLD", 2)
+    monkeypatch.setattr("smartbudget.web.app.STREAM_BATCH", 2)
+
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/dashboard?period=2026-11", headers={"Cookie": cookie})
+    response = conn.getresponse()
+    assert response.read() == expected
+    assert response.getheader("Content-Length") is None
+    assert response.getheader("Connection") == "close"
+    conn.close()
+
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/dashboard?period=2026-11", headers={"Cookie": cookie, "Accept-Encoding": "gzip"})
+    response = conn.getresponse()
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(response.read()) == expected
+    conn.close()
+
+
+def test_reports_endpoint_covers_a_range_of_months(server):
+    ok, user = repository.create_user("Pia", "pia@teste.com", "1234")
+    assert ok
+    save_transaction(int(user), parse_qs("transaction_type=income&amount=1000&description=Salario&txn_date=2026-01-05"))
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=200&description=Mercado&txn_date=2026-03-05"))
+    cookie = _login(server, "pia@teste.com", "1234")
+
+    def get(path: str) -> tuple[int, dict]:
+        conn = http.client.HTTPConnection(*server)
+        conn.request("GET", path, headers={"Cookie": cookie})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    status, report = get("/api/reports?start=2026-01&end=2026-03&window=2")
+    assert status == 200
+    assert report["totals"] == {"income": "1000", "expense": "200", "balance": "800"}
+    assert [month["period"] for month in report["months"]] == ["2026-01", "2026-02", "2026-03"]
+    assert report["rolling"][-1] == {"period": "2026-03", "income": "0.00", "expense": "100.00", "balance": "-100.00"}
+    assert report["categories"] == [{"category": "Alimentação", "amount": "200"}]
+
+    assert get("/api/reports?start=2026-04&end=2026-03")[0] == 400
+    assert get("/api/reports?start=2026-13")[0] == 400
+
+
+def test_metrics_endpoint_reports_request_and_db_timings(server, monkeypatch):
+    monkeypatch.setattr("smartbudget.web.app.metrics_token", "segredo")
+    ok, user = repository.create_user("Rui", "rui@teste.com", "1234")
+    assert ok
+    save_transaction(int(user), parse_qs("transaction_type=expense&amount=20&description=Mercado&txn_date=2026-03-05"))
+    cookie = _login(server, "rui@teste.com", "1234")
+    before = REQUEST_SECONDS.count("GET", "/api/dashboard")
+
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/dashboard?period=2026-03", headers={"Cookie": cookie})
+    conn.getresponse().read()
+    conn.request("GET", "/nao-existe")
+    conn.getresponse().read()
+    conn.request("GET", "/api/metrics", headers={"Cookie": cookie})
+    denied = conn.getresponse()
+    denied.read()
+    conn.request("GET", "/api/metrics", headers={"Authorization": "Bearer segredo"})
+    response = conn.getresponse()
+    body = response.read().decode("utf-8")
+    conn.close()
+
+    assert denied.status == 401
+
+    assert response.status == 200
+    assert response.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+    assert REQUEST_SECONDS.count("GET", "/api/dashboard") == before + 1
+    assert 'smartbudget_http_request_duration_seconds_count{method="GET",route="other"}' in body
+    assert "/nao-existe" not in body
+    assert 'smartbudget_db_operation_duration_seconds_count{operation="list_transactions"}' in body
+    assert 'smartbudget_render_duration_seconds_count{view="dashboard"}' in body
+    assert 'smartbudget_http_responses_total{status="404"}' in body
+    assert "smartbudget_render_cache_entries 1" in body
+
+
+def test_metrics_endpoint_is_disabled_without_a_token(server):
+    conn = http.client.HTTPConnection(*server)
+    conn.request("GET", "/api/metrics")
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+
+    assert response.status == 404
+
+
+def test_profile_header_is_honoured_for_admins_only(server, tmp_path, monkeypatch):
+    ok, admin = repository.create_user("Ana", "ana@teste.com", "1234")
+    assert ok
+    ok, other = repository.create_user("Bia", "bia@teste.com", "1234")
+    assert ok
+    monkeypatch.setattr(profiler, "output_dir", tmp_path)
+    monkeypatch.setattr(profiler, "admins", frozenset({int(admin)}))
+
+    for email in ("bia@teste.com", "ana@teste.com"):
+        cookie = _login(server, email, "1234")
+        conn = http.client.HTTPConnection(*server)
+        conn.request("GET", "/api/dashboard", headers={"Cookie": cookie, "X-Profile": "1"})
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        assert response.status == 200
+
+    # The report is written after the response has been sent.
+    deadline = time.monotonic() + 5
+    while not list(tmp_path.glob("*.txt")) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reports = sorted(path.name for path in tmp_path.iterdir())
+    assert len(reports) == 2
+    assert reports[0].endswith(f"-GET-api-dashboard-user-{admin}.prof")
+    assert reports[1].endswith(f"-GET-api-dashboard-user-{admin}.txt")